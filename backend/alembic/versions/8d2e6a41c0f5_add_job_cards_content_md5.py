@@ -0,0 +1,28 @@
+"""add job_cards.content_md5 to skip unchanged uploads
+
+Revision ID: 8d2e6a41c0f5
+Revises: 3f9c1d2a7b64
+Create Date: 2026-10-18 11:03:17.224901
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2e6a41c0f5'
+down_revision: Union[str, Sequence[str], None] = '3f9c1d2a7b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('job_cards', sa.Column('content_md5', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('job_cards', 'content_md5')
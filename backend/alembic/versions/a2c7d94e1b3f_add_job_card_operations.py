@@ -0,0 +1,141 @@
+"""move job_cards.operations into job_card_operations rows
+
+Revision ID: a2c7d94e1b3f
+Revises: f1a6c3e8b527
+Create Date: 2026-10-18 14:47:12.604381
+
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2c7d94e1b3f'
+down_revision: Union[str, Sequence[str], None] = 'f1a6c3e8b527'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Stored times have no offset; read them in the same zone the app uses (DB_TIMEZONE)
+TIMEZONE = os.getenv('DB_TIMEZONE', 'Europe/Moscow')
+
+# Whole or decimal minutes ("90", "90.0", "1,5"); decimals are rounded to whole minutes on backfill
+MNHRS_PATTERN = r'^-?\d+([.,]\d+)?$'
+
+OPERATION_NODE = '''jsonb_build_object(
+    'start_dttm', to_char(o.start_dttm, 'YYYY-MM-DD"T"HH24:MI'),
+    'end_dttm', to_char(o.end_dttm, 'YYYY-MM-DD"T"HH24:MI'),
+    'user', o.user_email,
+    'comment', o.comment,
+    'used_mnhrs', o.used_mnhrs
+)'''
+
+CREATE_VIEW = f'''
+    CREATE VIEW job_cards_with_operations AS
+    SELECT
+        jc.drive_id,
+        jc.name,
+        jc.creation_dttm,
+        jc.part_number,
+        jc.serial_number,
+        jc.modified_dttm,
+        ops.operations,
+        jc.project,
+        jc.is_active,
+        jc.content_md5
+    FROM job_cards jc
+    LEFT JOIN LATERAL (
+        SELECT COALESCE(jsonb_object_agg(o.name, {OPERATION_NODE}), '{{}}'::jsonb) AS operations
+        FROM job_card_operations o
+        WHERE o.drive_id = jc.drive_id
+    ) ops ON true
+'''
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('job_card_operations',
+    sa.Column('drive_id', sa.String(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('ordinal', sa.Integer(), nullable=False),
+    sa.Column('start_dttm', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('end_dttm', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('user_email', sa.String(), nullable=True),
+    sa.Column('comment', sa.String(), nullable=True),
+    sa.Column('used_mnhrs', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['drive_id'], ['job_cards.drive_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('drive_id', 'name')
+    )
+    op.create_index('ix_job_card_operations_in_work_group', 'job_card_operations',
+                    [sa.text("regexp_replace(name, '^\\d+_', '')")], unique=False,
+                    postgresql_where=sa.text('start_dttm IS NOT NULL AND end_dttm IS NULL'))
+
+    # used_mnhrs was free text in the JSON; anything that is not a number would
+    # be lost with the operations column, so stop here and let it be fixed first.
+    bad_mnhrs = op.get_bind().execute(sa.text(f'''
+        SELECT jc.drive_id, op.key, op.value ->> 'used_mnhrs'
+        FROM job_cards jc
+        CROSS JOIN LATERAL jsonb_each(jc.operations) AS op
+        WHERE jsonb_typeof(jc.operations) = 'object'
+          AND NULLIF(btrim(op.value ->> 'used_mnhrs'), '') IS NOT NULL
+          AND btrim(op.value ->> 'used_mnhrs') !~ '{MNHRS_PATTERN}'
+    ''')).fetchall()
+    if bad_mnhrs:
+        raise RuntimeError(
+            'used_mnhrs values that are not numbers, fix them before upgrading '
+            f'(drive_id, operation, value): {bad_mnhrs}'
+        )
+
+    # Backfill. Ordinal follows the NN_ prefix, prefix-less operations (PPK) last.
+    op.execute(f"SET LOCAL TIME ZONE '{TIMEZONE}'")
+    op.execute(r'''
+        INSERT INTO job_card_operations (
+            drive_id, name, ordinal, start_dttm, end_dttm, user_email, comment, used_mnhrs
+        )
+        SELECT
+            jc.drive_id,
+            op.key,
+            row_number() OVER (
+                PARTITION BY jc.drive_id
+                ORDER BY substring(op.key FROM '^\d+')::int NULLS LAST, op.key
+            ) - 1,
+            NULLIF(op.value ->> 'start_dttm', '')::timestamptz,
+            NULLIF(op.value ->> 'end_dttm', '')::timestamptz,
+            op.value ->> 'user',
+            op.value ->> 'comment',
+            round(replace(NULLIF(btrim(op.value ->> 'used_mnhrs'), ''), ',', '.')::numeric)::int
+        FROM job_cards jc
+        CROSS JOIN LATERAL jsonb_each(jc.operations) AS op
+        WHERE jsonb_typeof(jc.operations) = 'object'
+    ''')
+
+    op.drop_index('ix_job_cards_operations', table_name='job_cards', postgresql_using='gin')
+    op.drop_column('job_cards', 'operations')
+    op.execute(CREATE_VIEW)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP VIEW job_cards_with_operations')
+    op.add_column('job_cards', sa.Column('operations', postgresql.JSONB(), nullable=True))
+
+    op.execute(f"SET LOCAL TIME ZONE '{TIMEZONE}'")
+    op.execute(f'''
+        UPDATE job_cards jc
+        SET operations = ops.operations
+        FROM (
+            SELECT o.drive_id, jsonb_object_agg(o.name, {OPERATION_NODE}) AS operations
+            FROM job_card_operations o
+            GROUP BY o.drive_id
+        ) ops
+        WHERE jc.drive_id = ops.drive_id
+    ''')
+
+    op.create_index('ix_job_cards_operations', 'job_cards', ['operations'], unique=False,
+                    postgresql_using='gin')
+    op.drop_index('ix_job_card_operations_in_work_group', table_name='job_card_operations',
+                  postgresql_where=sa.text('start_dttm IS NOT NULL AND end_dttm IS NULL'))
+    op.drop_table('job_card_operations')
@@ -0,0 +1,64 @@
+"""add job_cards.operations_version for ETags
+
+Revision ID: b6f4a1d8e903
+Revises: d83e0b5a9c27
+Create Date: 2026-10-18 16:12:08.447519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6f4a1d8e903'
+down_revision: Union[str, Sequence[str], None] = 'd83e0b5a9c27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OPERATION_NODE = '''jsonb_build_object(
+    'start_dttm', to_char(o.start_dttm, 'YYYY-MM-DD"T"HH24:MI'),
+    'end_dttm', to_char(o.end_dttm, 'YYYY-MM-DD"T"HH24:MI'),
+    'user', o.user_email,
+    'comment', o.comment,
+    'used_mnhrs', o.used_mnhrs
+)'''
+
+
+def view_sql(with_version: bool) -> str:
+    return f'''
+        CREATE OR REPLACE VIEW job_cards_with_operations AS
+        SELECT
+            jc.drive_id,
+            jc.name,
+            jc.creation_dttm,
+            jc.part_number,
+            jc.serial_number,
+            jc.modified_dttm,
+            ops.operations,
+            jc.project,
+            jc.is_active,
+            jc.content_md5{',' if with_version else ''}
+            {'jc.operations_version' if with_version else ''}
+        FROM job_cards jc
+        LEFT JOIN LATERAL (
+            SELECT COALESCE(jsonb_object_agg(o.name, {OPERATION_NODE}), '{{}}'::jsonb) AS operations
+            FROM job_card_operations o
+            WHERE o.drive_id = jc.drive_id
+        ) ops ON true
+    '''
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('job_cards', sa.Column('operations_version', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.execute(view_sql(with_version=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # a view cannot lose columns with CREATE OR REPLACE
+    op.execute('DROP VIEW job_cards_with_operations')
+    op.execute(view_sql(with_version=False))
+    op.drop_column('job_cards', 'operations_version')
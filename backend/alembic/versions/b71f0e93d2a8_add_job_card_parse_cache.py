@@ -0,0 +1,38 @@
+"""add job_card_parse_cache
+
+Revision ID: b71f0e93d2a8
+Revises: 8d2e6a41c0f5
+Create Date: 2026-10-18 11:48:55.730162
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71f0e93d2a8'
+down_revision: Union[str, Sequence[str], None] = '8d2e6a41c0f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('job_card_parse_cache',
+    sa.Column('drive_id', sa.String(), nullable=False),
+    sa.Column('modified_dttm', sa.DateTime(), nullable=False),
+    sa.Column('header', sa.JSON(), nullable=False),
+    sa.Column('operations', sa.JSON(), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=False),
+    sa.Column('accessed_dttm', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('drive_id', 'modified_dttm')
+    )
+    op.create_index(op.f('ix_job_card_parse_cache_accessed_dttm'), 'job_card_parse_cache', ['accessed_dttm'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_job_card_parse_cache_accessed_dttm'), table_name='job_card_parse_cache')
+    op.drop_table('job_card_parse_cache')
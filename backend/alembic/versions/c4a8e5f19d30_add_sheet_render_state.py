@@ -0,0 +1,34 @@
+"""add sheet_render_state for diff-based master table rendering
+
+Revision ID: c4a8e5f19d30
+Revises: b71f0e93d2a8
+Create Date: 2026-10-18 12:37:02.118446
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a8e5f19d30'
+down_revision: Union[str, Sequence[str], None] = 'b71f0e93d2a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sheet_render_state',
+    sa.Column('sheet_name', sa.String(), nullable=False),
+    sa.Column('sheet_id', sa.Integer(), nullable=False),
+    sa.Column('cells', sa.JSON(), nullable=False),
+    sa.Column('rendered_dttm', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('sheet_name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('sheet_render_state')
@@ -0,0 +1,46 @@
+"""de-duplicate pending background_jobs by action and params
+
+Revision ID: c9e2f7a4d1b8
+Revises: b6f4a1d8e903
+Create Date: 2026-10-18 17:05:31.218046
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e2f7a4d1b8'
+down_revision: Union[str, Sequence[str], None] = 'b6f4a1d8e903'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PENDING = sa.text("status IN ('queued', 'running')")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index('uq_background_jobs_pending_action', table_name='background_jobs',
+                  postgresql_where=PENDING)
+    op.create_index('uq_background_jobs_pending_action_params', 'background_jobs',
+                    ['action', sa.text('(params::text)')], unique=True, postgresql_where=PENDING)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Only one pending job per action may remain
+    op.execute('''
+        UPDATE background_jobs b
+        SET status = 'failed', error = 'superseded by downgrade'
+        WHERE status IN ('queued', 'running')
+          AND EXISTS (
+              SELECT 1 FROM background_jobs o
+              WHERE o.action = b.action AND o.status IN ('queued', 'running') AND o.id < b.id
+          )
+    ''')
+    op.drop_index('uq_background_jobs_pending_action_params', table_name='background_jobs',
+                  postgresql_where=PENDING)
+    op.create_index('uq_background_jobs_pending_action', 'background_jobs', ['action'], unique=True,
+                    postgresql_where=PENDING)
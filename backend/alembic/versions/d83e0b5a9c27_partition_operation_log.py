@@ -0,0 +1,95 @@
+"""partition operation_log by month, jsonb message, brin and card indexes
+
+Revision ID: d83e0b5a9c27
+Revises: a2c7d94e1b3f
+Create Date: 2026-10-18 15:33:50.271844
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd83e0b5a9c27'
+down_revision: Union[str, Sequence[str], None] = 'a2c7d94e1b3f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Months created ahead of the current one; app.maintenance keeps this up
+PARTITIONS_AHEAD = 3
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('ALTER TABLE operation_log RENAME TO operation_log_legacy')
+    op.execute('ALTER TABLE operation_log_legacy RENAME CONSTRAINT operation_log_pkey TO operation_log_legacy_pkey')
+
+    op.execute('''
+        CREATE TABLE operation_log (
+            id bigint NOT NULL,
+            message_dttm timestamp NOT NULL,
+            message jsonb NOT NULL,
+            PRIMARY KEY (id, message_dttm)
+        ) PARTITION BY RANGE (message_dttm)
+    ''')
+    # Safety net for rows outside every monthly partition; normally empty
+    op.execute('CREATE TABLE operation_log_default PARTITION OF operation_log DEFAULT')
+
+    op.execute(f'''
+        DO $$
+        DECLARE
+            month date;
+            last_month date := (date_trunc('month', now()) + interval '{PARTITIONS_AHEAD} months')::date;
+        BEGIN
+            SELECT date_trunc('month', COALESCE(min(message_dttm), now()))::date
+            INTO month
+            FROM operation_log_legacy;
+
+            WHILE month <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF operation_log FOR VALUES FROM (%L) TO (%L)',
+                    'operation_log_y' || to_char(month, 'YYYY') || 'm' || to_char(month, 'MM'),
+                    month,
+                    (month + interval '1 month')::date
+                );
+                month := (month + interval '1 month')::date;
+            END LOOP;
+        END $$
+    ''')
+
+    op.execute('''
+        INSERT INTO operation_log (id, message_dttm, message)
+        SELECT id, message_dttm, message::jsonb FROM operation_log_legacy
+    ''')
+    op.execute('DROP TABLE operation_log_legacy')
+
+    op.execute('CREATE SEQUENCE operation_log_id_seq OWNED BY operation_log.id')
+    op.execute("SELECT setval('operation_log_id_seq', COALESCE(max(id), 0) + 1, false) FROM operation_log")
+    op.execute("ALTER TABLE operation_log ALTER COLUMN id SET DEFAULT nextval('operation_log_id_seq')")
+
+    op.create_index('ix_operation_log_message_dttm_brin', 'operation_log', ['message_dttm'], unique=False,
+                    postgresql_using='brin')
+    op.create_index('ix_operation_log_job_card', 'operation_log',
+                    [sa.text("(message ->> 'jobCardCode')"), sa.text("(message ->> 'operation')"), 'message_dttm'],
+                    unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('ALTER TABLE operation_log RENAME TO operation_log_partitioned')
+    op.create_table('operation_log',
+    sa.Column('id', sa.Integer(), sa.Identity(always=True), nullable=False),
+    sa.Column('message_dttm', sa.DateTime(), nullable=False),
+    sa.Column('message', sa.JSON(), nullable=False),
+    sa.PrimaryKeyConstraint('id', name='operation_log_pkey_plain')
+    )
+    op.execute('''
+        INSERT INTO operation_log (id, message_dttm, message)
+        OVERRIDING SYSTEM VALUE
+        SELECT id, message_dttm, message::json FROM operation_log_partitioned
+    ''')
+    op.execute("SELECT setval(pg_get_serial_sequence('operation_log', 'id'), COALESCE(max(id), 0) + 1, false) FROM operation_log")
+    op.execute('DROP TABLE operation_log_partitioned CASCADE')
+    op.execute('ALTER TABLE operation_log RENAME CONSTRAINT operation_log_pkey_plain TO operation_log_pkey')
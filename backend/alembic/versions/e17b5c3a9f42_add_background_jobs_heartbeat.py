@@ -0,0 +1,28 @@
+"""add background_jobs.heartbeat_dttm
+
+Revision ID: e17b5c3a9f42
+Revises: c9e2f7a4d1b8
+Create Date: 2026-10-18 17:32:54.806113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e17b5c3a9f42'
+down_revision: Union[str, Sequence[str], None] = 'c9e2f7a4d1b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('background_jobs', sa.Column('heartbeat_dttm', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('background_jobs', 'heartbeat_dttm')
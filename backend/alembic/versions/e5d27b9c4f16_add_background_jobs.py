@@ -0,0 +1,47 @@
+"""add background_jobs for long-running /wsop/go actions
+
+Revision ID: e5d27b9c4f16
+Revises: c4a8e5f19d30
+Create Date: 2026-10-18 13:21:47.502913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5d27b9c4f16'
+down_revision: Union[str, Sequence[str], None] = 'c4a8e5f19d30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('background_jobs',
+    sa.Column('id', sa.Integer(), sa.Identity(always=True), nullable=False),
+    sa.Column('action', sa.String(), nullable=False),
+    sa.Column('params', sa.JSON(), nullable=True),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('result', sa.JSON(), nullable=True),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('requested', sa.Integer(), nullable=False),
+    sa.Column('created_dttm', sa.DateTime(), nullable=False),
+    sa.Column('started_dttm', sa.DateTime(), nullable=True),
+    sa.Column('finished_dttm', sa.DateTime(), nullable=True),
+    sa.Column('worker', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_background_jobs_created_dttm'), 'background_jobs', ['created_dttm'], unique=False)
+    op.create_index('uq_background_jobs_pending_action', 'background_jobs', ['action'], unique=True,
+                    postgresql_where=sa.text("status IN ('queued', 'running')"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_background_jobs_pending_action', table_name='background_jobs',
+                  postgresql_where=sa.text("status IN ('queued', 'running')"))
+    op.drop_index(op.f('ix_background_jobs_created_dttm'), table_name='background_jobs')
+    op.drop_table('background_jobs')
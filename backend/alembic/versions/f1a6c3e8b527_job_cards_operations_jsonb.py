@@ -0,0 +1,44 @@
+"""job_cards.operations to jsonb, active (project, name) and GIN indexes
+
+Revision ID: f1a6c3e8b527
+Revises: e5d27b9c4f16
+Create Date: 2026-10-18 14:02:36.918204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1a6c3e8b527'
+down_revision: Union[str, Sequence[str], None] = 'e5d27b9c4f16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column('job_cards', 'operations',
+               existing_type=sa.JSON(),
+               type_=postgresql.JSONB(),
+               existing_nullable=True,
+               postgresql_using='operations::jsonb')
+    op.create_index('ix_job_cards_active_project_name', 'job_cards', ['project', 'name'], unique=False,
+                    postgresql_where=sa.text('is_active'))
+    op.create_index('ix_job_cards_operations', 'job_cards', ['operations'], unique=False,
+                    postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_job_cards_operations', table_name='job_cards', postgresql_using='gin')
+    op.drop_index('ix_job_cards_active_project_name', table_name='job_cards',
+                  postgresql_where=sa.text('is_active'))
+    op.alter_column('job_cards', 'operations',
+               existing_type=postgresql.JSONB(),
+               type_=sa.JSON(),
+               existing_nullable=True,
+               postgresql_using='operations::json')
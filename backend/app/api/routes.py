@@ -1,10 +1,53 @@
 # app.py
-from flask import Flask, request, jsonify
+import gzip
+
+from flask import Flask, Response, request, jsonify
+from ..config import get_settings
 from ..services import workshop as ws
 from . import api_bp
 
+settings = get_settings()
+
 app = Flask(__name__)
 
+@api_bp.after_request
+def gzip_response(response):
+    # UrlFetchApp sends Accept-Encoding: gzip and inflates transparently
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or "gzip" not in request.headers.get("Accept-Encoding", "").lower()
+    ):
+        return response
+
+    body = response.get_data()
+    if len(body) < settings.GZIP_MIN_BYTES:
+        return response
+
+    response.set_data(gzip.compress(body, compresslevel=6))
+    response.headers["Content-Encoding"] = "gzip"
+    response.vary.add("Accept-Encoding")
+    return response
+
+def _conditional(job_card: dict, payload):
+    '''
+    200 with ``payload()`` and a weak ETag, or 304 without building the body
+    when the client already has this version of the card.
+    '''
+    etag = ws.job_card_etag(job_card)
+
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        body = payload()
+        if body is None:
+            return jsonify({"error": "Data not found"}), 404
+        response = jsonify({"status": "success", "data": body})
+
+    response.set_etag(etag, weak=True)
+    return response
+
 @api_bp.get("/ping")
 def ping():
     return jsonify(ok=True, msg="pong")
@@ -16,29 +59,75 @@ def workshop_operations():
         if not json_data:
             return jsonify({"error": "No JSON data received"}), 400
 
-        ws.OperationManager().update_operation(json_data)
+        operation_data = ws.OperationManager().update_operation(json_data)
 
-        return jsonify({"status": "success", "data_received": json_data}), 200
+        return jsonify({"status": "success", "data": operation_data}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@api_bp.post("/wsop/bulk")
+def get_jobcards_bulk():
+    try:
+        json_data = request.get_json(silent=True) or {}
+        drive_ids = json_data.get("drive_ids")
+        operations = json_data.get("operations")
+
+        if not isinstance(drive_ids, list) or not all(isinstance(x, str) for x in drive_ids):
+            return jsonify({"error": "drive_ids must be a list of strings"}), 400
+        if len(drive_ids) > settings.BULK_MAX_IDS:
+            return jsonify({"error": f"At most {settings.BULK_MAX_IDS} drive_ids per request"}), 400
+        if operations is not None and (
+            not isinstance(operations, list) or not all(isinstance(x, str) for x in operations)
+        ):
+            return jsonify({"error": "operations must be a list of strings"}), 400
+
+        data, not_found = ws.OperationManager().get_job_cards_data(drive_ids, operations)
+
+        return jsonify({"status": "success", "data": data, "not_found": not_found}), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@api_bp.get("/wsop/cache/stats")
+def cache_stats():
+    return jsonify({"status": "success", "job_cards": ws.job_card_cache.stats()}), 200
+
 @api_bp.get("/wsop/<drive_id>")
 @api_bp.get("/wsop/<drive_id>/<operation>")
 def get_jobcard_data(drive_id, operation=None):
     try:
 
-        op = ws.OperationManager()
+        job_card = ws.OperationManager().get_job_card_data(drive_id)
+
+        if job_card is None:
+            return jsonify({"error": "Data not found"}), 404
 
         if operation:
-            op_data = op.get_single_operation_data(drive_id, operation)
-        else:
-            op_data = op.get_job_card_data(drive_id)
+            return _conditional(job_card, lambda: (job_card["operations"] or {}).get(operation))
 
-        if op_data is not None:
-            return jsonify({"status": "success", "data": op_data}), 200
+        return _conditional(job_card, lambda: job_card)
 
-        else:
-            return jsonify({"error": "Data not found"}), 404
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def _job_json(job: dict) -> dict:
+    return {
+        key: value.isoformat() if hasattr(value, "isoformat") else value
+        for key, value in job.items()
+    }
+
+# Actions that run as background jobs; the request returns 202 and a job id
+# to poll at /wsop/jobs/<id>. Send "wait": true to run inline instead.
+BACKGROUND_ACTIONS = {"db_upd", "mstr_upd", "prj_upd", "refresh"}
+
+@api_bp.get("/wsop/jobs/<int:job_id>")
+def get_job(job_id):
+    try:
+        job = ws.get_job_runner().get(job_id)
+        if job is None:
+            return jsonify({"error": "Job not found"}), 404
+
+        return jsonify({"status": "success", "job": _job_json(job)}), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -46,12 +135,14 @@ def get_jobcard_data(drive_id, operation=None):
 @api_bp.post("/wsop/go")
 def google_interactions():
     function_map = {
-        "db_upd": (ws.update_db_job_cards_info, False),
-        "mstr_upd": (ws.update_google_master_table, False),
+        "db_upd": (lambda data: ws.update_db_job_cards_info(**data), True),
+        "mstr_upd": (lambda data: ws.update_google_master_table(**data), True),
         "color": (lambda data: ws.color_master_table_cell(**data), True),
         "prj_upd": (ws.update_projects_google_sheet, False),
+        "refresh": (lambda data: ws.refresh(**data), True),
         "cell_note": (lambda data: ws.place_note_master_table(**data), True),
         "jc_clr": (lambda data: ws.close_job_card_color(**data), True),
+        "sheet_flush": (lambda: {"flushed": ws.get_sheet_write_queue().flush()}, False),
     }
 
     try:
@@ -63,14 +154,28 @@ def google_interactions():
         if not action or action not in function_map:
             return jsonify({"error": "Invalid or missing action"}), 400
 
+        if action in BACKGROUND_ACTIONS and not json_data.get("wait"):
+            job, created = ws.get_job_runner().submit(action, json_data.get("data", {}))
+            return jsonify({
+                "status": "accepted",
+                "action": action,
+                "job_id": job["id"],
+                "job_status": job["status"],
+                "merged": not created,
+            }), 202
+
         func, needs_args = function_map[action]
 
         if needs_args:
-            func(json_data.get("data", {}))
+            result = func(json_data.get("data", {}))
         else:
-            func()
+            result = func()
+
+        response = {"status": "success", "action": action}
+        if isinstance(result, dict):
+            response["result"] = result
 
-        return jsonify({"status": "success", "action": action}), 200
+        return jsonify(response), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
\ No newline at end of file
@@ -28,12 +28,44 @@ class Settings(BaseSettings):
     # Keep it simple as str; you can switch to typed DSN later
     DATABASE_URL: str
 
+    # Shared psycopg pool (one per gunicorn worker, see app/db.py)
+    DB_POOL_MIN_SIZE: int = 1
+    DB_POOL_MAX_SIZE: int = 5
+    DB_POOL_MAX_IDLE: float = 600.0        # seconds before an idle conn is closed
+    DB_POOL_MAX_LIFETIME: float = 3600.0   # seconds before a conn is recycled
+    DB_POOL_TIMEOUT: float = 30.0          # seconds to wait for a free conn
+    DB_TIMEZONE: str = "Europe/Moscow"     # session TimeZone; operation times without offset are in it
+    OPERATION_LOG_PARTITIONS_AHEAD: int = 3        # monthly operation_log partitions created in advance
+    OPERATION_LOG_RETENTION_MONTHS: int = 24       # older partitions are dropped by app.maintenance
+    JOB_CARD_CACHE_SIZE: int = 1000        # job cards kept per worker for GET /wsop/<drive_id>; 0 = off
+    JOB_CARD_CACHE_TTL: float = 30.0       # seconds a cached card is kept; hits are re-checked against job_cards
+    LOG_WRITER_BATCH_SIZE: int = 500       # operation_log rows per COPY
+    LOG_WRITER_FLUSH_INTERVAL: float = 1.0 # seconds a partial batch waits
+    LOG_WRITER_QUEUE_SIZE: int = 10000     # queued messages per worker before spilling to file
+    LOG_WRITER_SPILL_PATH: str = "./operation_log.spill.jsonl"   # messages kept here while the DB is unavailable
+    BACKGROUND_JOB_WORKERS: int = 2        # db_upd / mstr_upd / prj_upd jobs run at once per worker
+    BACKGROUND_JOB_TIMEOUT: float = 3600.0 # seconds before a queued/running job is considered dead
+    BACKGROUND_JOB_HEARTBEAT_INTERVAL: float = 15.0   # seconds between heartbeats of a worker's jobs
+    BACKGROUND_JOB_HEARTBEAT_TIMEOUT: float = 60.0    # seconds without a heartbeat before a job's worker is considered gone
+
     # --- API auth ---
     API_KEY_DEV: Optional[str] = None
+    GZIP_MIN_BYTES: int = 1024             # /v1 responses larger than this are gzipped if the client accepts it
+    BULK_MAX_IDS: int = 500                # drive ids accepted by one POST /v1/wsop/bulk
 
     # --- Google / Sheets ---
     GOOGLE_CREDS_PATH: str = "./google_creds.json"
     MASTER_SPREADSHEET_ID: str = ""
+    GOOGLE_HTTP_TIMEOUT: float = 60.0      # seconds per Google API request
+    SHEET_ID_CACHE_TTL: float = 600.0      # seconds a sheet title -> sheetId lookup is reused
+    SHEET_WRITE_WINDOW: float = 0.5        # seconds colour/note writes are merged before one batchUpdate; 0 = write at once
+    DRIVE_CRAWL_CONCURRENCY: int = 8       # parallel Drive folder listings
+    DRIVE_FULL_SYNC_INTERVAL_HOURS: float = 24.0   # full crawl fallback for db_upd
+    SYNC_INGEST_WORKERS: int = 4           # job cards read in parallel by db_upd
+    GOOGLE_API_RATE_LIMIT: float = 5.0     # Google requests/sec shared by ingest workers, 0 = off
+    JOB_CARD_FETCH_MODE: str = "targeted"  # "targeted" (column A + VALUES_MAP cells) or "full"
+    XLSX_SPOOL_MAX_BYTES: int = 8 * 1024 * 1024   # XLSX downloads above this go to disk
+    PARSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # job_card_parse_cache size before LRU eviction
 
     # --- Misc ---
     TZ: str = "Europe/Prague"
@@ -1,7 +1,107 @@
+import atexit
 import os
+import threading
+from contextlib import contextmanager
+
+import psycopg
+from psycopg_pool import ConnectionPool
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from .config import get_settings
+
+# One pool per process. Gunicorn forks workers after import, so the pool is
+# created lazily and re-created when the pid changes (a pool inherited from
+# the master would share sockets with its siblings).
+_pool: ConnectionPool | None = None
+_pool_pid: int | None = None
+_pool_lock = threading.Lock()
+
+
+def _psycopg_url(url: str) -> str:
+    # SQLAlchemy uses "postgresql+psycopg://"; raw psycopg uses "postgresql://"
+    if url.startswith("postgresql+psycopg://"):
+        url = url.replace("postgresql+psycopg://", "postgresql://", 1)
+    return url
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide psycopg pool, creating it on first use."""
+    global _pool, _pool_pid
+
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            settings = get_settings()
+            _pool = ConnectionPool(
+                conninfo=_psycopg_url(settings.DATABASE_URL),
+                min_size=settings.DB_POOL_MIN_SIZE,
+                max_size=settings.DB_POOL_MAX_SIZE,
+                max_idle=settings.DB_POOL_MAX_IDLE,
+                max_lifetime=settings.DB_POOL_MAX_LIFETIME,
+                timeout=settings.DB_POOL_TIMEOUT,   # seconds to wait for a free conn
+                name=f"nzoffside-{pid}",
+                # timestamptz columns are read and written in the shop's local time
+                kwargs={"options": f"-c TimeZone={settings.DB_TIMEZONE}"},
+                open=True,
+            )
+            _pool_pid = pid
+    return _pool
+
+
+def close_pool() -> None:
+    """Close this process' pool (called from gunicorn ``worker_exit``)."""
+    global _pool, _pool_pid
+
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.close()
+        _pool = None
+        _pool_pid = None
+
+
+atexit.register(close_pool)
+
+
+@contextmanager
+def advisory_lock(name: str):
+    """Hold the Postgres advisory lock ``name`` for the block, across all workers.
+
+    The lock is taken on a connection of its own rather than a pooled one, so
+    a job waiting for it (or holding it for a long sync) does not use up the
+    pool. It is a transaction lock and goes away with the connection, also if
+    the worker dies. Usable as a decorator.
+    """
+    with psycopg.connect(_psycopg_url(get_settings().DATABASE_URL)) as conn:
+        conn.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (name,))
+        yield
+
+
+class _SharedPool(NullPool):
+    """SQLAlchemy pool that borrows connections from :func:`get_pool`.
+
+    SQLAlchemy still runs its own checkout/reset logic, but instead of
+    closing the DBAPI connection on return it is handed back to psycopg_pool.
+    """
+
+    def status(self) -> str:
+        return "SharedPool"
+
+    def _close_connection(self, connection, *, terminate: bool = False) -> None:
+        if terminate:
+            # broken connection: close it so the pool discards it on return
+            connection.close()
+        get_pool().putconn(connection)
+
 
-DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DATABASE_URL, pool_pre_ping=True, future=True)
+engine = create_engine(
+    "postgresql+psycopg://",
+    creator=lambda: get_pool().getconn(),
+    poolclass=_SharedPool,
+    future=True,
+)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
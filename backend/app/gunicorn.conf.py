@@ -5,3 +5,37 @@ threads = 4
 timeout = 60
 accesslog = "-"
 errorlog = "-"
+
+
+def worker_exit(server, worker):
+    # Send colour/note writes still waiting in the write-behind queue
+    from app.services import workshop
+    if workshop._sheet_write_queue is not None:
+        try:
+            workshop._sheet_write_queue.flush()
+        except Exception as error:
+            worker.log.warning("sheet write flush failed: %s", error)
+
+    # Fail jobs this worker was running so new triggers are not merged into them
+    if workshop._job_runner is not None:
+        try:
+            workshop._job_runner.shutdown()
+        except Exception as error:
+            worker.log.warning("background job shutdown failed: %s", error)
+
+    # Write queued operation_log messages while the pool is still open
+    from app.services.log_writer import close_log_writer
+    close_log_writer()
+
+    # Return this worker's pooled connections to Postgres
+    from app.db import close_pool
+    close_pool()
+
+
+def post_worker_init(worker):
+    # Resolve master spreadsheet sheet ids before the first click arrives
+    from app.services.workshop import get_sheet_id_cache
+    try:
+        get_sheet_id_cache().warm()
+    except Exception as error:
+        worker.log.warning("sheet id cache warm-up failed: %s", error)
@@ -0,0 +1,168 @@
+'''
+Database housekeeping, run from cron or by hand:
+
+    python -m app.maintenance log-partitions [--ahead N] [--retention-months N] [--archive-dir DIR] [--dry-run]
+
+``log-partitions`` keeps the monthly partitions of operation_log in shape:
+partitions for the current month and ``--ahead`` months after it exist,
+and partitions that ended more than ``--retention-months`` ago are
+archived (gzipped CSV, when ``--archive-dir`` is given) and dropped.
+'''
+import argparse
+import gzip
+import logging
+import os
+import re
+from datetime import date
+
+from .config import get_settings
+from .db import close_pool, get_pool
+
+logger = logging.getLogger(__name__)
+
+LOG_TABLE = 'operation_log'
+DEFAULT_PARTITION = 'operation_log_default'
+PARTITION_NAME = re.compile(r'^operation_log_y(\d{4})m(\d{2})$')
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f'operation_log_y{month:%Y}m{month:%m}'
+
+
+def existing_partitions(cur) -> dict:
+    '''Monthly partition name -> first day of its month.'''
+    cur.execute(
+        '''
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = %s::regclass
+        ''',
+        (LOG_TABLE,)
+    )
+
+    result = {}
+    for (name,) in cur.fetchall():
+        match = PARTITION_NAME.match(name)
+        if match:
+            result[name] = date(int(match.group(1)), int(match.group(2)), 1)
+    return result
+
+
+def create_partition(cur, month: date):
+    '''
+    Create and attach the partition for ``month``. Rows that already landed
+    in the default partition for that month are moved into it first, so
+    the attach cannot fail on them.
+    '''
+    name = partition_name(month)
+    bounds = (month, add_months(month, 1))
+
+    cur.execute(f'CREATE TABLE {name} (LIKE {LOG_TABLE} INCLUDING DEFAULTS)')
+    cur.execute(
+        f'''
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION}
+            WHERE message_dttm >= %s AND message_dttm < %s
+            RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+        ''',
+        bounds
+    )
+    cur.execute(
+        f'''
+        ALTER TABLE {LOG_TABLE} ATTACH PARTITION {name}
+        FOR VALUES FROM ('{bounds[0]:%Y-%m-%d}') TO ('{bounds[1]:%Y-%m-%d}')
+        '''
+    )
+
+
+def archive_partition(cur, name: str, archive_dir: str) -> str:
+    path = os.path.join(archive_dir, f'{name}.csv.gz')
+
+    with gzip.open(path, 'wb') as fh, cur.copy(f'COPY {name} TO STDOUT (FORMAT csv, HEADER)') as copy:
+        for chunk in copy:
+            fh.write(chunk)
+
+    return path
+
+
+def maintain_log_partitions(ahead: int, retention_months: int, archive_dir: str | None = None,
+                            dry_run: bool = False, today: date | None = None) -> dict:
+
+    current = month_start(today or date.today())
+    wanted = [add_months(current, offset) for offset in range(ahead + 1)]
+    cutoff = add_months(current, -retention_months)
+
+    summary = {'created': [], 'dropped': [], 'archived': []}
+
+    with get_pool().connection() as conn:
+        with conn.cursor() as cur:
+            partitions = existing_partitions(cur)
+        present = set(partitions.values())
+
+        for month in wanted:
+            if month in present:
+                continue
+            summary['created'].append(partition_name(month))
+            if not dry_run:
+                with conn.transaction(), conn.cursor() as cur:
+                    create_partition(cur, month)
+
+        # A partition is expired once its whole month is before the cutoff
+        for name, month in sorted(partitions.items(), key=lambda item: item[1]):
+            if add_months(month, 1) > cutoff:
+                continue
+            summary['dropped'].append(name)
+            if dry_run:
+                continue
+
+            with conn.transaction(), conn.cursor() as cur:
+                if archive_dir:
+                    summary['archived'].append(archive_partition(cur, name, archive_dir))
+                cur.execute(f'ALTER TABLE {LOG_TABLE} DETACH PARTITION {name}')
+                cur.execute(f'DROP TABLE {name}')
+
+    return summary
+
+
+def main(argv: list | None = None):
+
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(prog='python -m app.maintenance')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    partitions = commands.add_parser('log-partitions', help='create future / drop expired operation_log partitions')
+    partitions.add_argument('--ahead', type=int, default=settings.OPERATION_LOG_PARTITIONS_AHEAD,
+                            help='months after the current one to create')
+    partitions.add_argument('--retention-months', type=int, default=settings.OPERATION_LOG_RETENTION_MONTHS,
+                            help='months of log to keep before the current one')
+    partitions.add_argument('--archive-dir', help='write expired partitions here as CSV.gz before dropping')
+    partitions.add_argument('--dry-run', action='store_true', help='only print what would change')
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(message)s')
+
+    try:
+        if args.command == 'log-partitions':
+            if args.archive_dir:
+                os.makedirs(args.archive_dir, exist_ok=True)
+            summary = maintain_log_partitions(args.ahead, args.retention_months, args.archive_dir, args.dry_run)
+            logger.info('operation_log partitions%s: %s', ' (dry run)' if args.dry_run else '', summary)
+    finally:
+        close_pool()
+
+
+if __name__ == '__main__':
+    main()
@@ -5,13 +5,19 @@ from datetime import datetime
 from typing import Any, Optional
 
 from sqlalchemy import (
+    BigInteger,
+    Sequence,
     String,
     Integer,
     Boolean,
     DateTime,
+    ForeignKey,
     JSON,
     Identity,
+    Index,
+    text,
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -24,25 +30,39 @@ class Base(DeclarativeBase):
 # -----------------------------
 class OperationLog(Base):
     __tablename__ = "operation_log"
+    __table_args__ = (
+        # time-range scans; cheap on an append-only table
+        Index("ix_operation_log_message_dttm_brin", "message_dttm", postgresql_using="brin"),
+        # one card's (and one operation's) history
+        Index(
+            "ix_operation_log_job_card",
+            text("(message ->> 'jobCardCode')"),
+            text("(message ->> 'operation')"),
+            "message_dttm",
+        ),
+        # monthly partitions + operation_log_default, see app.maintenance
+        {"postgresql_partition_by": "RANGE (message_dttm)"},
+    )
 
-    # id int4 GENERATED ALWAYS AS IDENTITY ...
+    # id int8 DEFAULT nextval('operation_log_id_seq'); the partition key
+    # has to be part of the primary key
     id: Mapped[int] = mapped_column(
-        Integer,
-        Identity(always=True),
+        BigInteger,
+        Sequence("operation_log_id_seq"),
         primary_key=True,
     )
 
     # message_dttm timestamp NOT NULL
     message_dttm: Mapped[datetime] = mapped_column(
         DateTime,
-        nullable=False,
+        primary_key=True,
         # Uncomment if you want DB to auto-fill with NOW():
         # server_default=func.now(),
     )
 
-    # message json NOT NULL
+    # message jsonb NOT NULL
     message: Mapped[dict[str, Any]] = mapped_column(
-        JSON,
+        JSONB,
         nullable=False,
     )
 
@@ -55,6 +75,15 @@ class OperationLog(Base):
 # -----------------------------
 class JobCard(Base):
     __tablename__ = "job_cards"
+    __table_args__ = (
+        # active cards in master/projects order (ORDER BY project, name)
+        Index(
+            "ix_job_cards_active_project_name",
+            "project",
+            "name",
+            postgresql_where=text("is_active"),
+        ),
+    )
 
     # drive_id varchar PRIMARY KEY
     drive_id: Mapped[str] = mapped_column(
@@ -82,10 +111,8 @@ class JobCard(Base):
         # server_default=func.now(),
     )
 
-    # operations json NULL
-    operations: Mapped[Optional[dict[str, Any]]] = mapped_column(
-        JSON, nullable=True
-    )
+    # operations live in job_card_operations; the job_cards_with_operations
+    # view adds them back as one jsonb "operations" column
 
     # project varchar NULL
     project: Mapped[Optional[str]] = mapped_column(String, nullable=True)
@@ -93,5 +120,166 @@ class JobCard(Base):
     # is_active bool NOT NULL
     is_active: Mapped[bool] = mapped_column(Boolean, nullable=False)
 
+    # content_md5 varchar NULL (Drive md5Checksum, uploaded files only)
+    content_md5: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+
+    # operations_version int4 NOT NULL DEFAULT 0 (bumped by every API
+    # write to job_card_operations; part of the GET ETag)
+    operations_version: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+
     def __repr__(self) -> str:
         return f"<JobCard drive_id={self.drive_id!r} part_number={self.part_number!r}>"
+
+
+# -----------------------------
+# public.job_card_operations
+# -----------------------------
+class JobCardOperation(Base):
+    __tablename__ = "job_card_operations"
+    __table_args__ = (
+        # "which cards have NDT in work": operation group without the NN_ prefix
+        Index(
+            "ix_job_card_operations_in_work_group",
+            text(r"regexp_replace(name, '^\d+_', '')"),
+            postgresql_where=text("start_dttm IS NOT NULL AND end_dttm IS NULL"),
+        ),
+    )
+
+    # (drive_id, name) PRIMARY KEY, drive_id -> job_cards ON DELETE CASCADE
+    drive_id: Mapped[str] = mapped_column(
+        String, ForeignKey("job_cards.drive_id", ondelete="CASCADE"), primary_key=True
+    )
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+
+    # ordinal int4 NOT NULL (position on the job card sheet)
+    ordinal: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    start_dttm: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    end_dttm: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    # user_email varchar NULL ("user" in the API shape)
+    user_email: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    comment: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+
+    # used_mnhrs int4 NULL (minutes)
+    used_mnhrs: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<JobCardOperation drive_id={self.drive_id!r} name={self.name!r}>"
+
+
+# -----------------------------
+# public.sync_state
+# -----------------------------
+class SyncState(Base):
+    __tablename__ = "sync_state"
+
+    # "name" varchar PRIMARY KEY, e.g. drive_changes_page_token
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+
+    # value varchar NOT NULL
+    value: Mapped[str] = mapped_column(String, nullable=False)
+
+    # updated_dttm timestamp NOT NULL
+    updated_dttm: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<SyncState name={self.name!r} value={self.value!r}>"
+
+
+# -----------------------------
+# public.job_card_parse_cache
+# -----------------------------
+class JobCardParseCache(Base):
+    __tablename__ = "job_card_parse_cache"
+
+    # (drive_id, modified_dttm) PRIMARY KEY
+    drive_id: Mapped[str] = mapped_column(String, primary_key=True)
+    modified_dttm: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+
+    # header json NOT NULL (JobCard.VALUES_MAP fields)
+    header: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False)
+
+    # operations json NOT NULL (JobCard.extracted_operations)
+    operations: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False)
+
+    # size_bytes int4 NOT NULL
+    size_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    # accessed_dttm timestamp NOT NULL
+    accessed_dttm: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<JobCardParseCache drive_id={self.drive_id!r} modified_dttm={self.modified_dttm!r}>"
+
+
+# -----------------------------
+# public.sheet_render_state
+# -----------------------------
+class SheetRenderState(Base):
+    __tablename__ = "sheet_render_state"
+
+    # sheet_name varchar PRIMARY KEY, e.g. "master"
+    sheet_name: Mapped[str] = mapped_column(String, primary_key=True)
+
+    # sheet_id int4 NOT NULL (Google sheetId the cells were rendered to)
+    sheet_id: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    # cells json NOT NULL ("row,col" -> value/color/link/note)
+    cells: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False)
+
+    # rendered_dttm timestamp NOT NULL
+    rendered_dttm: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<SheetRenderState sheet_name={self.sheet_name!r} rendered_dttm={self.rendered_dttm!r}>"
+
+
+# -----------------------------
+# public.background_jobs
+# -----------------------------
+class BackgroundJob(Base):
+    __tablename__ = "background_jobs"
+    __table_args__ = (
+        # at most one queued/running job per action and params; later
+        # triggers with the same params join it
+        Index(
+            "uq_background_jobs_pending_action_params",
+            "action",
+            text("(params::text)"),
+            unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+    )
+
+    # id int4 GENERATED ALWAYS AS IDENTITY
+    id: Mapped[int] = mapped_column(Integer, Identity(always=True), primary_key=True)
+
+    # action varchar NOT NULL, e.g. db_upd
+    action: Mapped[str] = mapped_column(String, nullable=False)
+
+    # params json NULL (keyword arguments of the action)
+    params: Mapped[Optional[dict[str, Any]]] = mapped_column(JSON, nullable=True)
+
+    # status varchar NOT NULL: queued / running / succeeded / failed
+    status: Mapped[str] = mapped_column(String, nullable=False)
+
+    # result json NULL, error varchar NULL
+    result: Mapped[Optional[dict[str, Any]]] = mapped_column(JSON, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+
+    # requested int4 NOT NULL (triggers merged into this job)
+    requested: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    created_dttm: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    started_dttm: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_dttm: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    # heartbeat_dttm timestamp NULL (refreshed by the owning worker while pending)
+    heartbeat_dttm: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    # worker varchar NULL (host:pid that runs the job)
+    worker: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<BackgroundJob id={self.id} action={self.action!r} status={self.status!r}>"
@@ -0,0 +1,189 @@
+import json
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from psycopg.rows import dict_row
+
+from ..db import get_pool
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+JOB_COLUMNS = '''
+    id, action, params, status, result, error, requested,
+    created_dttm, started_dttm, finished_dttm, heartbeat_dttm, worker
+'''
+
+
+class JobRunner:
+    '''
+    Runs long /wsop/go actions off the request thread.
+
+    Jobs live in the ``background_jobs`` table, so any worker can report on
+    them. A partial unique index allows one queued or running job per
+    action and params: a trigger that arrives while an identical one
+    exists is merged into it (``requested`` is bumped) instead of starting
+    a second run. Different params (e.g. ``{"full": true}``) get a job of
+    their own. The worker that created a job runs it on its own small
+    thread pool and refreshes ``heartbeat_dttm`` of its jobs every
+    ``heartbeat_interval`` seconds.
+    Before a new trigger is accepted, pending jobs whose heartbeat is older
+    than ``heartbeat_timeout`` (owner killed) or that were created more
+    than ``timeout`` seconds ago are marked failed.
+    '''
+
+    def __init__(self, handlers: dict, max_workers: int = 2, timeout: float = 3600,
+                 heartbeat_interval: float = 15.0, heartbeat_timeout: float = 60.0):
+        self.handlers = handlers
+        self.timeout = timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.worker = f'{socket.gethostname()}:{os.getpid()}'
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='wsop-job')
+        self._active: set[int] = set()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._heartbeat = threading.Thread(target=self._beat, name='wsop-job-heartbeat', daemon=True)
+        self._heartbeat.start()
+
+    def submit(self, action: str, params: dict | None = None) -> tuple[dict, bool]:
+        '''Queue ``action`` or join the one already pending; returns (job, created).'''
+        if action not in self.handlers:
+            raise KeyError(f'Unknown job action {action!r}')
+
+        now = datetime.now()
+        # json keeps the input text, so sorted keys make equal params compare equal
+        params_json = json.dumps(params or {}, sort_keys=True)
+
+        with get_pool().connection() as conn, conn.transaction(), conn.cursor(row_factory=dict_row) as cur:
+            timed_out = now - timedelta(seconds=self.timeout)
+            cur.execute(
+                '''
+                UPDATE background_jobs
+                SET status = %s,
+                    error = CASE WHEN created_dttm < %s THEN 'timed out' ELSE 'worker lost' END,
+                    finished_dttm = %s
+                WHERE action = %s AND status IN (%s, %s)
+                  AND (created_dttm < %s OR COALESCE(heartbeat_dttm, created_dttm) < %s)
+                ''',
+                (FAILED, timed_out, now, action, QUEUED, RUNNING,
+                 timed_out, now - timedelta(seconds=self.heartbeat_timeout))
+            )
+
+            # The pending job may finish between the insert and the merge;
+            # in that case the next insert succeeds.
+            for _ in range(3):
+                cur.execute(
+                    f'''
+                    INSERT INTO background_jobs (action, params, status, requested, created_dttm, heartbeat_dttm, worker)
+                    VALUES (%s, %s::json, %s, 1, %s, %s, %s)
+                    ON CONFLICT (action, (params::text)) WHERE status IN ('{QUEUED}', '{RUNNING}') DO NOTHING
+                    RETURNING {JOB_COLUMNS}
+                    ''',
+                    (action, params_json, QUEUED, now, now, self.worker)
+                )
+                job = cur.fetchone()
+                if job:
+                    created = True
+                    break
+
+                cur.execute(
+                    f'''
+                    UPDATE background_jobs SET requested = requested + 1
+                    WHERE action = %s AND params::text = %s AND status IN (%s, %s)
+                    RETURNING {JOB_COLUMNS}
+                    ''',
+                    (action, params_json, QUEUED, RUNNING)
+                )
+                job = cur.fetchone()
+                if job:
+                    created = False
+                    break
+            else:
+                raise RuntimeError(f'Could not queue job {action!r}')
+
+        if created:
+            with self._lock:
+                self._active.add(job['id'])
+            self._executor.submit(self._run, job['id'], action, job['params'] or {})
+
+        return job, created
+
+    def get(self, job_id: int) -> dict | None:
+        with get_pool().connection() as conn, conn.cursor(row_factory=dict_row) as cur:
+            cur.execute(f'SELECT {JOB_COLUMNS} FROM background_jobs WHERE id = %s', (job_id,))
+            return cur.fetchone()
+
+    def _set(self, job_id: int, **values):
+        if self._closed.is_set():
+            # after shutdown the job is already failed and the pool may be closed
+            logger.warning('Background job %s finished after shutdown, not recorded: %s', job_id, values)
+            return
+
+        columns = ', '.join(f'{column} = %s' for column in values)
+
+        with get_pool().connection() as conn:
+            conn.execute(f'UPDATE background_jobs SET {columns} WHERE id = %s', (*values.values(), job_id))
+
+    def _run(self, job_id: int, action: str, params: dict):
+        self._set(job_id, status=RUNNING, started_dttm=datetime.now())
+
+        try:
+            result = self.handlers[action](**params)
+        except Exception as error:
+            logger.exception('Background job %s (%s) failed', job_id, action)
+            self._set(job_id, status=FAILED, error=f'{type(error).__name__}: {error}', finished_dttm=datetime.now())
+        else:
+            result = json.dumps(result if isinstance(result, dict) else None, default=str)
+            self._set(job_id, status=SUCCEEDED, result=result, finished_dttm=datetime.now())
+        finally:
+            with self._lock:
+                self._active.discard(job_id)
+
+    def _beat(self):
+        while not self._closed.wait(self.heartbeat_interval):
+            with self._lock:
+                active = list(self._active)
+            if not active:
+                continue
+
+            try:
+                with get_pool().connection() as conn:
+                    conn.execute(
+                        'UPDATE background_jobs SET heartbeat_dttm = %s WHERE id = ANY(%s) AND status IN (%s, %s)',
+                        (datetime.now(), active, QUEUED, RUNNING)
+                    )
+            except Exception as error:
+                logger.warning('Background job heartbeat failed: %s', error)
+
+    def shutdown(self):
+        '''
+        Stop taking jobs and fail the ones this worker still owns, so they do
+        not block new triggers. Threads still running a job are not waited
+        for; they no longer write to the database.
+        '''
+        self._closed.set()
+        self._heartbeat.join(timeout=5)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+        with self._lock:
+            active, self._active = list(self._active), set()
+
+        if active:
+            with get_pool().connection() as conn:
+                conn.execute(
+                    '''
+                    UPDATE background_jobs
+                    SET status = %s, error = 'worker exited', finished_dttm = %s
+                    WHERE id = ANY(%s) AND status IN (%s, %s)
+                    ''',
+                    (FAILED, datetime.now(), active, QUEUED, RUNNING)
+                )
@@ -0,0 +1,84 @@
+from .drive_crawler import DriveCrawler
+
+
+class DriveChangesFeed:
+    '''
+    Thin wrapper over the Drive changes API.
+
+    ``changes`` returns every change after ``page_token`` (all pages) and the
+    token to store for the next run.
+    '''
+
+    FIELDS = (
+        'nextPageToken, newStartPageToken, '
+        'changes(fileId, removed, file(id, name, mimeType, parents, modifiedTime, md5Checksum, trashed))'
+    )
+
+    def __init__(self, google_api_factory):
+        self._google_api_factory = google_api_factory
+
+    def start_page_token(self) -> str:
+        drive_service = self._google_api_factory().drive_service
+        return drive_service.changes().getStartPageToken().execute()['startPageToken']
+
+    def changes(self, page_token: str) -> tuple[list, str]:
+        drive_service = self._google_api_factory().drive_service
+        result = []
+
+        while True:
+            response = drive_service.changes().list(
+                pageToken=page_token,
+                fields=self.FIELDS,
+                includeRemoved=True,
+                spaces='drive',
+                pageSize=1000
+            ).execute()
+
+            result.extend(response.get('changes', []))
+
+            if 'newStartPageToken' in response:
+                return result, response['newStartPageToken']
+
+            page_token = response['nextPageToken']
+
+
+def classify_changes(changes: list, in_work_folders: list) -> tuple[list, set, bool]:
+    '''
+    Split Drive changes into job card files to check and file ids to deactivate.
+
+    A file counts as a job card while one of its parents is an ``in_work``
+    folder; it is tagged with that folder's project. Removed, trashed or
+    moved-away files go to the deactivate set. Folder changes cannot be
+    resolved from the feed alone (a moved folder does not list its
+    children), so they set the third value, meaning "run a full crawl".
+    '''
+
+    project_by_folder = {folder['id']: folder['project'] for folder in in_work_folders}
+    job_cards = {}
+    gone = set()
+    needs_full_crawl = False
+
+    for change in changes:
+        file = change.get('file') or {}
+        file_id = change.get('fileId') or file.get('id')
+
+        if file.get('mimeType') == DriveCrawler.FOLDER_MIME_TYPE:
+            needs_full_crawl = True
+            continue
+
+        project = next((project_by_folder[p] for p in file.get('parents', []) if p in project_by_folder), None)
+
+        if change.get('removed') or file.get('trashed') or project is None:
+            job_cards.pop(file_id, None)
+            gone.add(file_id)
+        else:
+            gone.discard(file_id)
+            job_cards[file_id] = {
+                'id': file_id,
+                'name': file.get('name'),
+                'modifiedTime': file.get('modifiedTime'),
+                'md5Checksum': file.get('md5Checksum'),
+                'project': project,
+            }
+
+    return list(job_cards.values()), gone, needs_full_crawl
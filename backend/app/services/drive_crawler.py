@@ -0,0 +1,76 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class DriveCrawler:
+    '''
+    Walk PROJECTS_FOLDER -> project folders -> in_work folders -> job card files.
+
+    Every level is listed on a bounded thread pool (GoogleApiService clients
+    are per-thread, so workers do not share a transport). Files are tagged
+    with the name of the project folder they were found in, same as the
+    serial crawl did. Wall time and request count of each level are kept
+    in ``timings``.
+    '''
+
+    FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+    def __init__(self, google_api_factory, root_folder_id: str, max_workers: int = 8):
+        self._google_api_factory = google_api_factory
+        self.root_folder_id = root_folder_id
+        self.max_workers = max(1, max_workers)
+        self.timings: dict[str, dict] = {}
+
+    def _list(self, query: str) -> list:
+        return self._google_api_factory().get_folder_files_info(query)
+
+    def _list_tagged(self, folder: dict, query: str) -> list:
+        return [x | {'project': folder['project']} for x in self._list(query)]
+
+    def _run_level(self, name: str, executor, folders: list, make_query) -> list:
+        started = time.perf_counter()
+        result = []
+        for files in executor.map(lambda folder: self._list_tagged(folder, make_query(folder)), folders):
+            result.extend(files)
+        self.timings[name] = {
+            'seconds': round(time.perf_counter() - started, 3),
+            'folders': len(folders),
+            'found': len(result),
+        }
+        return result
+
+    def _list_in_work_folders(self, executor) -> list:
+        started = time.perf_counter()
+        projects_folders = self._list(f"'{self.root_folder_id}' in parents and trashed = false")
+        self.timings['projects'] = {
+            'seconds': round(time.perf_counter() - started, 3),
+            'folders': 1,
+            'found': len(projects_folders),
+        }
+
+        return self._run_level(
+            'in_work_folders',
+            executor,
+            [x | {'project': x['name']} for x in projects_folders],
+            lambda folder: f"'{folder['id']}' in parents and mimeType='{self.FOLDER_MIME_TYPE}' and name contains 'in_work'",
+        )
+
+    def list_in_work_folders(self) -> list:
+        '''Return in_work folders (id, name, project) without listing their files.'''
+        self.timings = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='drive-crawl') as executor:
+            return self._list_in_work_folders(executor)
+
+    def crawl(self) -> list:
+        '''Return job card files (id, name, modifiedTime, project).'''
+        self.timings = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='drive-crawl') as executor:
+            in_work_folders = self._list_in_work_folders(executor)
+            return self._run_level(
+                'job_cards',
+                executor,
+                in_work_folders,
+                lambda folder: f"'{folder['id']}' in parents and trashed = false",
+            )
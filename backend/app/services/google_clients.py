@@ -0,0 +1,108 @@
+import datetime
+import json
+import os
+import threading
+import time
+
+import httplib2
+from google.auth.transport.requests import Request
+from google.oauth2 import service_account
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+
+from ..config import get_settings
+
+SCOPES = ['https://www.googleapis.com/auth/drive',
+          'https://www.googleapis.com/auth/spreadsheets'
+          ]
+
+
+class GoogleClientCache:
+    '''
+    Per-process cache of Google API clients.
+
+    Discovery documents are read once from the copy bundled with
+    google-api-python-client, credentials are shared and refreshed by a
+    daemon thread before they expire. httplib2 is not thread-safe, so every
+    thread gets its own keep-alive transport and service objects.
+    '''
+
+    # Refresh well ahead of google-auth's own expiry threshold so request
+    # threads never block on a token refresh.
+    REFRESH_MARGIN = datetime.timedelta(minutes=10)
+
+    def __init__(self, credentials_info: dict, scopes: list[str] = SCOPES, timeout: float = 60):
+        self.credentials = service_account.Credentials.from_service_account_info(credentials_info, scopes=scopes)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._documents: dict[tuple[str, str], str] = {}
+        self._local = threading.local()
+
+        self._refresh()
+        threading.Thread(target=self._refresh_loop, name='google-creds-refresh', daemon=True).start()
+
+    def _refresh(self):
+        # Own requests-based transport: the per-thread httplib2 objects
+        # must not be touched from this thread.
+        with self._lock:
+            self.credentials.refresh(Request())
+
+    def _refresh_loop(self):
+        while True:
+            now = datetime.datetime.now(datetime.timezone.utc)
+            expiry = self.credentials.expiry
+            # google-auth keeps expiry as naive UTC
+            expiry = expiry.replace(tzinfo=datetime.timezone.utc) if expiry else now
+            delay = (expiry - self.REFRESH_MARGIN - now).total_seconds()
+            time.sleep(max(delay, 30))
+            try:
+                self._refresh()
+            except Exception:
+                # Request threads still refresh on demand if this keeps failing
+                continue
+
+    def _document(self, name: str, version: str) -> str:
+        key = (name, version)
+        if key not in self._documents:
+            with self._lock:
+                if key not in self._documents:
+                    document = discovery_cache.get_static_doc(name, version)
+                    if document is None:
+                        raise ValueError(f'No bundled discovery document for {name} {version}')
+                    self._documents[key] = document
+        return self._documents[key]
+
+    def service(self, name: str, version: str):
+        services = getattr(self._local, 'services', None)
+        if services is None:
+            services = self._local.services = {}
+            self._local.http = AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=self.timeout))
+
+        key = (name, version)
+        if key not in services:
+            services[key] = build_from_document(self._document(name, version), http=self._local.http)
+        return services[key]
+
+
+_cache: GoogleClientCache | None = None
+_cache_pid: int | None = None
+_cache_lock = threading.Lock()
+
+
+def get_client_cache() -> GoogleClientCache:
+    '''Return this process' client cache, creating it on first use (fork-safe).'''
+    global _cache, _cache_pid
+
+    pid = os.getpid()
+    if _cache is not None and _cache_pid == pid:
+        return _cache
+
+    with _cache_lock:
+        if _cache is None or _cache_pid != pid:
+            settings = get_settings()
+            with open(settings.GOOGLE_CREDS_PATH) as f:
+                creds = json.loads(f.read())
+            _cache = GoogleClientCache(creds, timeout=settings.GOOGLE_HTTP_TIMEOUT)
+            _cache_pid = pid
+    return _cache
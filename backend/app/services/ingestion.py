@@ -0,0 +1,76 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SUCCESS = 'success'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+
+
+class RateLimiter:
+    '''
+    Token bucket shared by all ingestion threads.
+
+    ``acquire`` blocks until a token is available; ``rate`` tokens are added
+    per second up to ``burst``. A rate of 0 disables limiting.
+    '''
+
+    def __init__(self, rate: float, burst: int | None = None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait = (1 - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+
+def run_ingestion(files: list, handle, max_workers: int = 4) -> tuple[dict, list]:
+    '''
+    Call ``handle(file)`` for every file on a bounded thread pool.
+
+    ``handle`` returns ``(SUCCESS, result)`` or ``(SKIPPED, None)``; any
+    exception it raises marks only that file as FAILED. Returns a summary
+    with per-status counts and the failed / skipped files, and the results
+    of the successful files.
+    '''
+
+    started = time.perf_counter()
+
+    def _run(file):
+        try:
+            return file, *handle(file), None
+        except Exception as error:
+            return file, FAILED, None, f'{type(error).__name__}: {error}'
+
+    summary = {'total': len(files), SUCCESS: 0, SKIPPED: 0, FAILED: 0, 'failures': [], 'skips': []}
+    results = []
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='jc-ingest') as executor:
+        for file, status, result, error in executor.map(_run, files):
+            summary[status] += 1
+            if status == SUCCESS:
+                results.append(result)
+            elif status == FAILED:
+                summary['failures'].append({'id': file['id'], 'name': file.get('name'), 'error': error})
+            elif status == SKIPPED:
+                summary['skips'].append({'id': file['id'], 'name': file.get('name')})
+
+    summary['seconds'] = round(time.perf_counter() - started, 3)
+    return summary, results
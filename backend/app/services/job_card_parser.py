@@ -0,0 +1,65 @@
+import re
+
+
+class JobCardParser:
+    '''
+    Parser for one job card template, built once and reused for every card.
+
+    Works on the row/column grid returned by the Sheets API (list of rows,
+    1-based ``'{row}_{col}'`` keys in ``values_map``). Operations are the
+    column A values between the start and end markers, read in row order;
+    every operation gets its own fields dict.
+    '''
+
+    OPERATION_FIELDS = ('start_dttm', 'end_dttm', 'comment', 'user', 'used_mnhrs')
+
+    def __init__(self, values_map: dict, start_marker: str = 'Start date', end_marker: str = 'End date',
+                 closing_operation: str = 'PPK'):
+        self.values_map = values_map
+        self.closing_operation = closing_operation
+        self._start = re.compile(re.escape(start_marker))
+        self._end = re.compile(re.escape(end_marker))
+        self._cells = {
+            key: tuple(int(part) - 1 for part in cell.split('_'))
+            for key, cell in values_map.items()
+        }
+        self.max_col = max(col for _, col in self._cells.values()) + 1
+        self.last_header_row = max(row for row, _ in self._cells.values()) + 1
+
+    def is_end(self, value) -> bool:
+        return isinstance(value, str) and self._end.search(value) is not None
+
+    @staticmethod
+    def normalise_name(value) -> str:
+        return str(value).replace('\n', '')
+
+    def header(self, rows: list) -> dict:
+        result = {}
+        for key, (row, col) in self._cells.items():
+            value = rows[row][col] if row < len(rows) and col < len(rows[row]) else None
+            result[key] = value if value else None
+        return result
+
+    def operations(self, rows: list) -> dict:
+        result = {}
+        collection = False
+
+        for row in rows:
+            value = row[0] if row else None
+
+            if not value:
+                continue
+
+            value = str(value)
+
+            if self._end.search(value):
+                break
+
+            if collection:
+                result[self.normalise_name(value)] = dict.fromkeys(self.OPERATION_FIELDS)
+
+            if self._start.search(value):
+                collection = True
+
+        result[self.closing_operation] = dict.fromkeys(self.OPERATION_FIELDS)
+        return result
@@ -0,0 +1,167 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from ..config import get_settings
+from ..db import get_pool
+
+logger = logging.getLogger(__name__)
+
+
+class LogWriter:
+    '''
+    Write-behind writer for operation_log.
+
+    ``write`` only puts the message on a bounded in-memory queue. A daemon
+    thread collects up to ``batch_size`` messages or waits at most
+    ``interval`` seconds, and writes the batch with one COPY. A batch that
+    cannot be written (database down), and messages that do not fit in a
+    full queue, are appended to ``spill_path`` as JSON lines; the spill
+    file is loaded again before the next successful batch. ``close``
+    drains the queue and stops the thread.
+    '''
+
+    COPY_SQL = 'COPY operation_log (message_dttm, message) FROM STDIN'
+
+    def __init__(self, spill_path: str, batch_size: int = 500, interval: float = 1.0, max_queue: int = 10000):
+        self.spill_path = spill_path
+        self.batch_size = max(1, batch_size)
+        self.interval = interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._spill_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='operation-log-writer', daemon=True)
+        self._thread.start()
+
+    def write(self, message: dict, message_dttm: datetime | None = None):
+        entry = (message_dttm or datetime.now(), message)
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self._spill([entry])
+
+    def close(self, timeout: float = 10.0):
+        self._stop.set()
+        try:
+            self._queue.put_nowait(None)    # wake the thread if it waits for messages
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+            elif self._stop.is_set():
+                return
+
+    def _collect(self) -> list:
+        batch = []
+        deadline = time.monotonic() + self.interval
+
+        while len(batch) < self.batch_size:
+            try:
+                if self._stop.is_set():
+                    # closing: drain what is left without waiting
+                    entry = self._queue.get_nowait()
+                else:
+                    entry = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+
+            if entry is not None:
+                batch.append(entry)
+
+        return batch
+
+    def _copy(self, rows):
+        with get_pool().connection() as conn, conn.transaction(), conn.cursor() as cur:
+            with cur.copy(self.COPY_SQL) as copy:
+                for message_dttm, message in rows:
+                    copy.write_row((message_dttm, json.dumps(message)))
+
+    def _flush(self, batch: list):
+        try:
+            self._copy(batch)
+        except Exception as error:
+            logger.warning('operation_log write failed, spilling %d messages: %s', len(batch), error)
+            self._spill(batch)
+            return
+
+        self._replay_spill()
+
+    def _spill(self, entries: list):
+        with self._spill_lock, open(self.spill_path, 'a', encoding='utf-8') as fh:
+            for message_dttm, message in entries:
+                fh.write(json.dumps({'message_dttm': message_dttm.isoformat(), 'message': message}) + '\n')
+
+    def _replay_spill(self):
+        if not os.path.exists(self.spill_path):
+            return
+
+        # The rename hands the file to this worker only; others keep appending to a new one
+        replay_path = f'{self.spill_path}.{os.getpid()}.replay'
+        with self._spill_lock:
+            try:
+                os.replace(self.spill_path, replay_path)
+            except FileNotFoundError:
+                return
+
+        with open(replay_path, encoding='utf-8') as fh:
+            entries = [json.loads(line) for line in fh if line.strip()]
+
+        try:
+            self._copy((datetime.fromisoformat(entry['message_dttm']), entry['message']) for entry in entries)
+        except Exception as error:
+            logger.warning('operation_log spill replay failed, keeping %d messages: %s', len(entries), error)
+            self._spill([(datetime.fromisoformat(entry['message_dttm']), entry['message']) for entry in entries])
+        else:
+            logger.info('operation_log spill replayed: %d messages', len(entries))
+
+        os.remove(replay_path)
+
+
+_writer: LogWriter | None = None
+_writer_pid: int | None = None
+_writer_lock = threading.Lock()
+
+
+def get_log_writer() -> LogWriter:
+    '''Per-process writer; a forked worker starts its own thread.'''
+    global _writer, _writer_pid
+
+    pid = os.getpid()
+    if _writer is not None and _writer_pid == pid:
+        return _writer
+
+    with _writer_lock:
+        if _writer is None or _writer_pid != pid:
+            settings = get_settings()
+            _writer = LogWriter(
+                settings.LOG_WRITER_SPILL_PATH,
+                settings.LOG_WRITER_BATCH_SIZE,
+                settings.LOG_WRITER_FLUSH_INTERVAL,
+                settings.LOG_WRITER_QUEUE_SIZE,
+            )
+            _writer_pid = pid
+    return _writer
+
+
+def close_log_writer():
+    '''Flush and stop this process' writer (gunicorn ``worker_exit`` / exit).'''
+    global _writer, _writer_pid
+
+    with _writer_lock:
+        if _writer is not None and _writer_pid == os.getpid():
+            _writer.close()
+        _writer = None
+        _writer_pid = None
+
+
+atexit.register(close_log_writer)
@@ -0,0 +1,61 @@
+import re
+import threading
+import time
+
+from googleapiclient.errors import HttpError
+
+# Only the messages Sheets gives for a deleted sheet; other 400s mentioning
+# sheetId (e.g. a bad GridRange) are real errors and must not be retried
+INVALID_SHEET_ID = re.compile(r'No grid with id|[Ii]nvalid sheet ?id')
+
+
+def is_invalid_sheet_id_error(error: HttpError) -> bool:
+    '''batchUpdate failed because a request points at a sheetId that no longer exists.'''
+    return error.status_code == 400 and INVALID_SHEET_ID.search(str(error)) is not None
+
+
+class SheetIdCache:
+    '''
+    Sheet title -> sheetId for one spreadsheet, shared by all threads of a
+    worker. All titles are loaded with one spreadsheets().get call and kept
+    for ``ttl`` seconds, or until ``invalidate`` is called after a
+    batchUpdate rejected a cached id.
+    '''
+
+    def __init__(self, sheets_service_factory, spreadsheet_id: str, ttl: float = 600):
+        self._sheets_service_factory = sheets_service_factory
+        self.spreadsheet_id = spreadsheet_id
+        self.ttl = ttl
+        self._ids: dict[str, int] = {}
+        self._loaded = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        sheet_metadata = self._sheets_service_factory().spreadsheets().get(
+            spreadsheetId=self.spreadsheet_id,
+            fields="sheets(properties(sheetId,title))"
+        ).execute()
+
+        self._ids = {
+            sheet['properties']['title']: sheet['properties']['sheetId']
+            for sheet in sheet_metadata['sheets']
+        }
+        self._loaded = time.monotonic()
+
+    def get(self, title: str) -> int:
+        with self._lock:
+            if not self._ids or time.monotonic() - self._loaded > self.ttl or title not in self._ids:
+                self._load()
+
+            try:
+                return self._ids[title]
+            except KeyError:
+                raise KeyError(f'Sheet {title!r} not found in spreadsheet {self.spreadsheet_id}') from None
+
+    def invalidate(self):
+        with self._lock:
+            self._ids = {}
+
+    def warm(self):
+        with self._lock:
+            self._load()
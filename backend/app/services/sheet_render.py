@@ -0,0 +1,233 @@
+LINK_TEXT_FORMAT = {
+    "foregroundColor": {"red": 0.0, "green": 0.0, "blue": 1.0},
+    "underline": True
+}
+
+# Everything a master table cell can carry; listed fields that are missing
+# from a cell payload are cleared by updateCells.
+CELL_FIELDS = "userEnteredValue,userEnteredFormat.backgroundColor,userEnteredFormat.textFormat,note"
+
+
+def cell_key(row_idx: int, col_idx: int) -> str:
+    return f'{row_idx},{col_idx}'
+
+
+def _position(key: str) -> tuple[int, int]:
+    row_idx, col_idx = key.split(',')
+    return int(row_idx), int(col_idx)
+
+
+def master_cells(sheets_data: list, hyperlinks: dict, colors: dict, comments: dict) -> dict:
+    '''
+    Flatten OperationManager.create_sheets_dataset output into one dict
+    ``"row,col" -> cell`` with the value, colour, note and link of every
+    rendered cell. This is the form the last render is stored and diffed in.
+    '''
+    cells = {}
+
+    def cell(row_idx, col_idx):
+        return cells.setdefault(cell_key(row_idx, col_idx), {})
+
+    for row_idx, row in enumerate(sheets_data):
+        for col_idx, value in enumerate(row):
+            cell(row_idx, col_idx)['value'] = str(value)
+
+    for (row_idx, col_idx), color in colors.items():
+        cell(row_idx, col_idx)['color'] = color
+
+    for (row_idx, col_idx), (name, url) in hyperlinks.items():
+        cell(row_idx, col_idx)['link'] = [name, url]
+
+    for (row_idx, col_idx), note in comments.items():
+        cell(row_idx, col_idx)['note'] = str(note)
+
+    return cells
+
+
+def diff_cells(previous: dict, current: dict, ignore: set = frozenset()) -> dict:
+    '''
+    Cells of ``current`` that differ from ``previous``; cells that are gone
+    map to ``{}`` so they get cleared. Keys in ``ignore`` are not compared.
+    '''
+    changed = {}
+
+    for key in previous.keys() | current.keys():
+        if key in ignore:
+            continue
+        if previous.get(key) != current.get(key):
+            changed[key] = current.get(key, {})
+
+    return changed
+
+
+def cell_payload(cell: dict) -> dict:
+    '''CellData for one master table cell.'''
+    payload = {}
+    user_format = {}
+
+    if 'link' in cell:
+        name, url = cell['link']
+        payload["userEnteredValue"] = {"formulaValue": f'=HYPERLINK("{url}"; "{name}")'}
+        user_format["textFormat"] = LINK_TEXT_FORMAT
+    elif 'value' in cell:
+        payload["userEnteredValue"] = {"stringValue": cell['value']}
+
+    if 'color' in cell:
+        user_format["backgroundColor"] = cell['color']
+
+    if user_format:
+        payload["userEnteredFormat"] = user_format
+
+    if 'note' in cell:
+        payload["note"] = cell['note']
+
+    return payload
+
+
+def cells_update_requests(sheet_id: int, cells: dict) -> list:
+    '''
+    updateCells requests writing ``cells`` (value, colour, link and note at
+    once). Changed cells that are next to each other in a row share one
+    request.
+    '''
+    by_row = {}
+    for key, cell in cells.items():
+        row_idx, col_idx = _position(key)
+        by_row.setdefault(row_idx, {})[col_idx] = cell
+
+    requests = []
+    for row_idx in sorted(by_row):
+        row_cells = by_row[row_idx]
+        columns = sorted(row_cells)
+
+        start = columns[0]
+        run = []
+        for col_idx in columns + [None]:
+            if run and col_idx != start + len(run):
+                requests.append({
+                    "updateCells": {
+                        "range": {
+                            "sheetId": sheet_id,
+                            "startRowIndex": row_idx,
+                            "endRowIndex": row_idx + 1,
+                            "startColumnIndex": start,
+                            "endColumnIndex": start + len(run)
+                        },
+                        "rows": [{"values": run}],
+                        "fields": CELL_FIELDS
+                    }
+                })
+                run = []
+                start = col_idx
+            if col_idx is not None:
+                run.append(cell_payload(row_cells[col_idx]))
+
+    return requests
+
+
+def coalesce_ranges(keys) -> list[tuple[int, int, int, int]]:
+    '''
+    Merge cell keys into rectangles ``(start_row, end_row, start_col, end_col)``
+    (end exclusive): horizontal runs first, then identical runs on
+    consecutive rows.
+    '''
+    by_row = {}
+    for key in keys:
+        row_idx, col_idx = _position(key)
+        by_row.setdefault(row_idx, []).append(col_idx)
+
+    open_ranges = {}   # (start_col, end_col) -> [start_row, end_row]
+    result = []
+
+    for row_idx in sorted(by_row):
+        runs = []
+        for col_idx in sorted(by_row[row_idx]):
+            if runs and runs[-1][1] == col_idx:
+                runs[-1][1] += 1
+            else:
+                runs.append([col_idx, col_idx + 1])
+
+        next_open = {}
+        for start_col, end_col in runs:
+            span = open_ranges.pop((start_col, end_col), None)
+            if span and span[1] == row_idx:
+                span[1] += 1
+            else:
+                if span:
+                    result.append((span[0], span[1], start_col, end_col))
+                span = [row_idx, row_idx + 1]
+            next_open[(start_col, end_col)] = span
+
+        result.extend((span[0], span[1], start_col, end_col) for (start_col, end_col), span in open_ranges.items())
+        open_ranges = next_open
+
+    result.extend((span[0], span[1], start_col, end_col) for (start_col, end_col), span in open_ranges.items())
+    return sorted(result)
+
+
+def full_render_requests(sheet_id: int, cells: dict) -> list:
+    '''
+    Whole-sheet render in three requests: clear the sheet, write every
+    value, colour, link formula and note inline in one updateCells over the
+    used rectangle, and apply the link text format to coalesced ranges.
+    Produces the same sheet as a clear followed by per-cell repeatCell
+    requests.
+    '''
+    requests = [
+        {
+            "updateCells": {
+                "range": {"sheetId": sheet_id},
+                "fields": "userEnteredValue,userEnteredFormat.backgroundColor,userEnteredFormat.textFormat.foregroundColor,note"
+                }
+        }
+    ]
+
+    if not cells:
+        return requests
+
+    positions = [_position(key) for key in cells]
+    n_rows = max(row_idx for row_idx, _ in positions) + 1
+    n_cols = max(col_idx for _, col_idx in positions) + 1
+
+    rows = []
+    for row_idx in range(n_rows):
+        values = []
+        for col_idx in range(n_cols):
+            payload = cell_payload(cells.get(cell_key(row_idx, col_idx), {}))
+            # text format goes in the ranged request below
+            payload.get("userEnteredFormat", {}).pop("textFormat", None)
+            if payload.get("userEnteredFormat") == {}:
+                del payload["userEnteredFormat"]
+            values.append(payload)
+        rows.append({"values": values})
+
+    requests.append({
+        "updateCells": {
+            "range": {
+                "sheetId": sheet_id,
+                "startRowIndex": 0,
+                "endRowIndex": n_rows,
+                "startColumnIndex": 0,
+                "endColumnIndex": n_cols
+            },
+            "rows": rows,
+            "fields": "userEnteredValue,userEnteredFormat.backgroundColor,note"
+        }
+    })
+
+    for start_row, end_row, start_col, end_col in coalesce_ranges(key for key, cell in cells.items() if 'link' in cell):
+        requests.append({
+            "repeatCell": {
+                "range": {
+                    "sheetId": sheet_id,
+                    "startRowIndex": start_row,
+                    "endRowIndex": end_row,
+                    "startColumnIndex": start_col,
+                    "endColumnIndex": end_col
+                },
+                "cell": {"userEnteredFormat": {"textFormat": LINK_TEXT_FORMAT}},
+                "fields": "userEnteredFormat.textFormat"
+            }
+        })
+
+    return requests
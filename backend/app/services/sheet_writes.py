@@ -0,0 +1,157 @@
+import json
+import logging
+import threading
+import time
+
+from .sheet_render import cell_key, coalesce_ranges
+
+logger = logging.getLogger(__name__)
+
+
+def cell_write_requests(sheet_id: int, cells: dict) -> list:
+    '''
+    repeatCell requests for queued writes ``"row,col" -> {"color": .., "note": ..}``
+    (0-based). Only the queued fields are touched; cells with the same
+    payload are merged into rectangles.
+    '''
+    groups = {}
+    for key, fields in cells.items():
+        groups.setdefault(json.dumps(fields, sort_keys=True), []).append(key)
+
+    requests = []
+    for payload, keys in sorted(groups.items()):
+        fields = json.loads(payload)
+        cell = {}
+        mask = []
+
+        if 'color' in fields:
+            cell["userEnteredFormat"] = {"backgroundColor": fields['color']}
+            mask.append("userEnteredFormat.backgroundColor")
+        if 'note' in fields:
+            cell["note"] = fields['note']        # None clears the note
+            mask.append("note")
+
+        for start_row, end_row, start_col, end_col in coalesce_ranges(keys):
+            requests.append({
+                "repeatCell": {
+                    "range": {
+                        "sheetId": sheet_id,
+                        "startRowIndex": start_row,
+                        "endRowIndex": end_row,
+                        "startColumnIndex": start_col,
+                        "endColumnIndex": end_col
+                    },
+                    "cell": cell,
+                    "fields": ",".join(mask)
+                }
+            })
+
+    return sorted(requests, key=lambda r: (r["repeatCell"]["range"]["startRowIndex"],
+                                           r["repeatCell"]["range"]["startColumnIndex"]))
+
+
+class SheetWriteQueue:
+    '''
+    Write-behind buffer for small master sheet edits (cell colour, note).
+
+    ``put`` records the write and returns at once; the first write of a
+    burst sets a deadline ``window`` seconds ahead, and everything queued
+    until then goes out as one batchUpdate through ``send(cells)``. Writes
+    to the same cell field overwrite each other (last write wins). The
+    sends are made by one long-lived flusher thread per queue, so the
+    per-thread Google client (see google_clients) and its connection are
+    reused between bursts. ``flush`` sends pending writes immediately and
+    returns after they are applied. A window of 0 flushes on every ``put``.
+
+    Cells of a failed send go back into the queue under any newer writes
+    to the same cell, and the flusher retries after ``retry_delay``
+    seconds, doubling up to ``max_retry_delay``. After ``max_attempts``
+    failed sends in a row the cells are logged and dropped.
+    '''
+
+    def __init__(self, send, window: float = 0.5, retry_delay: float = 1.0, max_retry_delay: float = 60.0,
+                 max_attempts: int = 8):
+        self._send = send
+        self.window = window
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_attempts = max_attempts
+        self._failures = 0                     # failed sends in a row
+        self._pending: dict[str, dict] = {}
+        self._due: float | None = None         # monotonic deadline of the pending burst
+        self._lock = threading.Lock()          # guards _pending, _due and _thread
+        self._wake = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()    # one batchUpdate at a time, in order
+        self._thread: threading.Thread | None = None
+
+    def put(self, row_idx: int, col_idx: int, **fields):
+        with self._lock:
+            self._pending.setdefault(cell_key(row_idx, col_idx), {}).update(fields)
+
+            if self.window > 0 and self._due is None:
+                self._due = time.monotonic() + self.window
+                self._start_flusher()
+                self._wake.notify()
+
+        if self.window <= 0:
+            self.flush()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                cells, self._pending = self._pending, {}
+                self._due = None
+
+            if not cells:
+                return 0
+
+            try:
+                self._send(cells)
+            except Exception:
+                self._requeue(cells)
+                raise
+
+            with self._lock:
+                self._failures = 0
+            return len(cells)
+
+    def _requeue(self, cells: dict):
+        with self._lock:
+            self._failures += 1
+
+            if self._failures >= self.max_attempts:
+                logger.error('Sheet writes dropped after %d failed sends: %s', self._failures, cells)
+                self._failures = 0
+                return
+
+            for key, fields in cells.items():
+                self._pending[key] = {**fields, **self._pending.get(key, {})}
+
+            delay = min(self.retry_delay * 2 ** (self._failures - 1), self.max_retry_delay)
+            self._due = time.monotonic() + delay
+            self._start_flusher()
+            self._wake.notify()
+
+    def _start_flusher(self):
+        # Called with _lock held; a forked worker gets a fresh queue, so no pid check
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='sheet-write-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while self._due is None or self._due > time.monotonic():
+                    self._wake.wait(None if self._due is None else self._due - time.monotonic())
+
+            self._flush_in_background()
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Sheet write-behind flush failed, will retry')
@@ -1,44 +1,73 @@
-import re
+import time
 import json 
+import logging
 from psycopg_pool import ConnectionPool
-import io
+import tempfile
+from contextlib import contextmanager
 from datetime import datetime
-from google.oauth2 import service_account
-from googleapiclient.discovery import build, HttpError
+from functools import partial
+from googleapiclient.discovery import HttpError
 from googleapiclient.http import MediaIoBaseDownload
 from zoneinfo import ZoneInfo
 from openpyxl import load_workbook
 
 from ..config import get_settings
+from ..db import advisory_lock, get_pool
+from .background_jobs import JobRunner
+from .drive_changes import DriveChangesFeed, classify_changes
+from .drive_crawler import DriveCrawler
+from .google_clients import get_client_cache
+from .ingestion import RateLimiter, SKIPPED, SUCCESS, run_ingestion
+from .job_card_parser import JobCardParser
+from .log_writer import get_log_writer
+from .read_cache import TTLCache
+from .sheet_metadata import SheetIdCache, is_invalid_sheet_id_error
+from .sheet_render import cell_key, cells_update_requests, diff_cells, full_render_requests, master_cells
+from .sheet_writes import SheetWriteQueue, cell_write_requests
 
 settings = get_settings()
 MASTER_SPREADSHEET_ID = settings.MASTER_SPREADSHEET_ID
 
+logger = logging.getLogger(__name__)
+
+# Advisory locks serialising work that must not run twice at once in any
+# worker: the Drive -> job_cards sync, and a master render (which diffs
+# against sheet_render_state and saves it after the write).
+SYNC_LOCK = 'nzoffside:job_cards_sync'
+MASTER_RENDER_LOCK = 'nzoffside:master_render'
+
+# GET /wsop/<drive_id> rows, per worker. Writes in this worker invalidate
+# their card; a cached card is only served after its job_cards version
+# columns still match (see OperationManager._cached_job_cards), so writes
+# made by other workers are seen at once.
+job_card_cache = TTLCache(settings.JOB_CARD_CACHE_SIZE, settings.JOB_CARD_CACHE_TTL)
+
 class DbManager:
     def __init__(self, row_factory=None):
-        # SQLAlchemy uses "postgresql+psycopg://"; raw psycopg uses "postgresql://"
-        url = settings.DATABASE_URL
-        if url.startswith("postgresql+psycopg://"):
-            url = url.replace("postgresql+psycopg://", "postgresql://", 1)
-
-        self.url = url
         self.row_factory = row_factory
         self.db_pool: ConnectionPool | None = None
 
     def __enter__(self):
-        # min_size/max_size mirror your old SimpleConnectionPool(1, 5)
-        self.db_pool = ConnectionPool(
-            conninfo=self.url,
-            min_size=1,
-            max_size=5,
-            timeout=30,          # seconds to wait for a free conn
-            kwargs={},           # extra psycopg.connect kwargs if needed
-        )
+        # Borrow the process-wide pool; it outlives this context manager
+        self.db_pool = get_pool()
         return self
 
     def __exit__(self, exc_type, exc, tb):
-        if self.db_pool:
-            self.db_pool.close()
+        self.db_pool = None
+
+    @contextmanager
+    def transaction(self):
+        '''Yield a cursor; everything run on it commits (or rolls back) together.'''
+        if not self.db_pool:
+            raise RuntimeError("DbManager used without context manager")
+
+        with self.db_pool.connection() as conn:
+            cursor_kwargs = {}
+            if self.row_factory:
+                cursor_kwargs["row_factory"] = self.row_factory
+
+            with conn.transaction(), conn.cursor(**cursor_kwargs) as cur:
+                yield cur
 
     def execute_query(self, query: str, params: tuple | None = None, fetch_results: bool = False):
         if not self.db_pool:
@@ -59,23 +88,17 @@ class DbManager:
 
 class GoogleApiService:
 
-    SCOPES = ['https://www.googleapis.com/auth/drive',
-              'https://www.googleapis.com/auth/spreadsheets'
-              ]
-    
-    with open(settings.GOOGLE_CREDS_PATH) as f:
-        CREDS = json.loads(f.read())
-
     def __init__(self):
-        self.credentials = service_account.Credentials.from_service_account_info(self.CREDS, scopes=self.SCOPES)
+        self._clients = get_client_cache()
+        self.credentials = self._clients.credentials
 
     @property
     def drive_service(self):
-        return build('drive', 'v3', credentials=self.credentials)
+        return self._clients.service('drive', 'v3')
 
     @property
     def sheets_service(self):
-        return build('sheets', 'v4', credentials=self.credentials)
+        return self._clients.service('sheets', 'v4')
     
     def get_folder_files_info(self, query: str) -> list:
 
@@ -86,7 +109,7 @@ class GoogleApiService:
 
             response = self.drive_service.files().list(
                     q=query,
-                    fields="nextPageToken, files(id, name, modifiedTime)",
+                    fields="nextPageToken, files(id, name, modifiedTime, md5Checksum)",
                     pageToken=page_token,
                     pageSize=100
                 ).execute()
@@ -99,6 +122,34 @@ class GoogleApiService:
 
         return result
      
+# Operation node key (API / JSON shape) -> job_card_operations column
+OPERATION_COLUMNS = {
+    'start_dttm': 'start_dttm',
+    'end_dttm': 'end_dttm',
+    'user': 'user_email',
+    'comment': 'comment',
+    'used_mnhrs': 'used_mnhrs',
+}
+
+# How each node key is bound in an INSERT; '' clears a timestamp like null does
+OPERATION_COLUMN_INPUT = {
+    'start_dttm': "NULLIF(%(start_dttm)s, '')::timestamptz",
+    'end_dttm': "NULLIF(%(end_dttm)s, '')::timestamptz",
+    'user': '%(user)s',
+    'comment': '%(comment)s',
+    'used_mnhrs': '%(used_mnhrs)s::integer',
+}
+
+# One job_card_operations row in the JSON shape the API has always returned.
+# Keep in sync with the job_cards_with_operations view.
+OPERATION_NODE = '''jsonb_build_object(
+    'start_dttm', to_char(start_dttm, 'YYYY-MM-DD"T"HH24:MI'),
+    'end_dttm', to_char(end_dttm, 'YYYY-MM-DD"T"HH24:MI'),
+    'user', user_email,
+    'comment', comment,
+    'used_mnhrs', used_mnhrs
+)'''
+
 class OperationManager:
 
     COLORS_DICT = {
@@ -111,33 +162,19 @@ class OperationManager:
         pass
 
     def _save_log(self, message: dict):
-        """Save operation log to database"""
+        """Queue the operation log message; LogWriter COPYs it to the database in batches"""
 
-        query = '''
-                INSERT INTO operation_log (
-                    message_dttm,
-                    message
-                )
-                VALUES (%s, %s)
-        '''
-        
-        params = (
-            datetime.now(),
-            json.dumps(message)
-        )
-        
-        with DbManager() as db:
-            db.execute_query(query, params)
+        get_log_writer().write(message)
 
     def _update_operation(self, message: dict):
-        """Update operation data in JSON column"""
+        """
+        Update one row of job_card_operations and queue the audit log
+        message if the job card exists. Returns the updated operation
+        node, or None if the job card does not exist.
+        """
         drive_id = message.get('jobCardCode')
         operation = message.get('operation')
 
-        if not drive_id or not operation:
-        # Nothing sensible to update
-            return
-        
         operation_data = {}
         mapping = {
             'startDateTime': 'start_dttm',
@@ -151,48 +188,154 @@ class OperationManager:
             if src in message:
                 operation_data[dst] = message.get(src)
 
-        if not operation_data:
-            return       
+        if not drive_id or not operation or not operation_data:
+            # Nothing sensible to update, keep the event in the log only
+            self._save_log(message)
+            return
 
-        query = '''
-                UPDATE job_cards
-                SET operations = jsonb_set(
-                    operations::jsonb,                     -- cast to jsonb
-                    ARRAY[%s],
-                    COALESCE((operations::jsonb) -> %s, '{}'::jsonb) || %s::jsonb,
-                    true
-                )::json                                    -- cast back if the column type is json
-                WHERE drive_id = %s;
-            '''
-        
-        params = (
-            operation,               # path element
-            operation,               # lookup existing node
-            json.dumps(operation_data),      # only the keys you’re updating (e.g., {"comment":"test"})
-            drive_id
+        columns = list(operation_data)
+        values = ', '.join(OPERATION_COLUMN_INPUT[column] for column in columns)
+        updates = ', '.join(
+            f'{OPERATION_COLUMNS[column]} = excluded.{OPERATION_COLUMNS[column]}' for column in columns
         )
-                
+
+        # Only this operation's row is written; the card's
+        # operations_version is bumped for ETags (see job_card_etag)
+        query = f'''
+                WITH updated AS (
+                    INSERT INTO job_card_operations (
+                        drive_id,
+                        name,
+                        ordinal,
+                        {', '.join(OPERATION_COLUMNS[column] for column in columns)}
+                    )
+                    SELECT
+                        jc.drive_id,
+                        %(operation)s,
+                        COALESCE((SELECT max(o.ordinal) + 1 FROM job_card_operations o WHERE o.drive_id = jc.drive_id), 0),
+                        {values}
+                    FROM job_cards jc
+                    WHERE jc.drive_id = %(drive_id)s
+                    ON CONFLICT (drive_id, name) DO UPDATE SET {updates}
+                    RETURNING {OPERATION_NODE} AS operation
+                ),
+                bumped AS (
+                    UPDATE job_cards SET operations_version = operations_version + 1
+                    WHERE drive_id = %(drive_id)s AND EXISTS (SELECT 1 FROM updated)
+                )
+                SELECT operation FROM updated;
+            '''
+
+        params = {
+            **operation_data,        # only the keys you’re updating (e.g., {"comment":"test"})
+            'operation': operation,
+            'drive_id': drive_id,
+        }
+
         with DbManager() as db:
-            db.execute_query(query, params)
+            rows, _ = db.execute_query(query, params, fetch_results=True)
 
-    def update_operation(self, message:dict):
+        if not rows:
+            return None
 
-        self._update_operation(message)
+        job_card_cache.invalidate([drive_id])
         self._save_log(message)
+        return rows[0][0]
 
-    def _get_operations_data(self):
+    def update_operation(self, message:dict):
 
-        query = 'SELECT * FROM job_cards WHERE is_active = True ORDER BY project, name'
+        return self._update_operation(message)
 
-        with DbManager() as db:
-            job_cards_table, description = db.execute_query(query, fetch_results=True)
-            columns = [col[0] for col in description] 
-        
-        return [dict(zip(columns, row)) for row in job_cards_table]
+    @staticmethod
+    def _fetch_dicts(query: str, params: tuple | None = None, cur=None) -> list[dict]:
+        '''Rows as dicts, on ``cur`` when given (shared transaction) or on a pooled connection.'''
+        if cur is None:
+            with DbManager() as db, db.transaction() as cur:
+                return OperationManager._fetch_dicts(query, params, cur)
+
+        cur.execute(query, params or ())
+        columns = [col[0] for col in cur.description]
+        return [dict(zip(columns, row)) for row in cur.fetchall()]
 
-    def create_sheets_dataset(self) -> list[list[str]]:
+    def _get_operations_data(self, cur=None):
 
-        db_data = self._get_operations_data()
+        query = 'SELECT * FROM job_cards_with_operations WHERE is_active = True ORDER BY project, name'
+
+        return self._fetch_dicts(query, cur=cur)
+
+    def read_snapshot(self) -> tuple[list, list]:
+        '''
+        Active job card rows and project stats read in one REPEATABLE READ
+        transaction, so the master and projects sheets show the same
+        database state.
+        '''
+        with DbManager() as db, db.transaction() as cur:
+            cur.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY')
+            return self._get_operations_data(cur), self.get_projects_stats(cur)
+
+    def get_projects_stats(self, cur=None) -> list[dict]:
+        '''
+        Per-project counters for the projects sheet, aggregated in Postgres
+        over the job_card_operations rows of the active job cards. ``groups`` maps an
+        operation group (name without the ``NN_`` prefix) to
+        ``[in_work, closed, to_do]``; ``last_operation`` is the latest
+        start/end timestamp of any operation.
+        '''
+
+        query = r'''
+            WITH ops AS (
+                SELECT
+                    jc.project,
+                    jc.drive_id,
+                    regexp_replace(o.name, '^\d+_', '') AS grp,
+                    o.start_dttm,
+                    o.end_dttm
+                FROM job_cards jc
+                LEFT JOIN job_card_operations o ON o.drive_id = jc.drive_id
+                WHERE jc.is_active = True
+            ),
+            per_project AS (
+                SELECT
+                    project,
+                    count(DISTINCT drive_id) AS job_cards,
+                    count(*) FILTER (WHERE grp = 'PPK' AND end_dttm IS NOT NULL) AS closed_job_cards,
+                    greatest(max(start_dttm), max(end_dttm)) AS last_operation
+                FROM ops
+                GROUP BY project
+            ),
+            per_group AS (
+                SELECT
+                    project,
+                    grp,
+                    count(*) FILTER (WHERE end_dttm IS NULL AND start_dttm IS NOT NULL) AS in_work,
+                    count(*) FILTER (WHERE end_dttm IS NOT NULL) AS closed,
+                    count(*) FILTER (WHERE end_dttm IS NULL AND start_dttm IS NULL) AS to_do
+                FROM ops
+                WHERE grp = ANY(%s)
+                GROUP BY project, grp
+            )
+            SELECT
+                p.project,
+                p.job_cards,
+                p.closed_job_cards,
+                p.last_operation,
+                COALESCE(
+                    json_object_agg(g.grp, json_build_array(g.in_work, g.closed, g.to_do))
+                        FILTER (WHERE g.grp IS NOT NULL),
+                    '{}'
+                ) AS groups
+            FROM per_project p
+            LEFT JOIN per_group g ON g.project IS NOT DISTINCT FROM p.project
+            GROUP BY p.project, p.job_cards, p.closed_job_cards, p.last_operation
+            ORDER BY p.project
+        '''
+
+        return self._fetch_dicts(query, (PROJECT_GROUPS,), cur)
+
+    def create_sheets_dataset(self, db_data: list | None = None) -> list[list[str]]:
+
+        if db_data is None:
+            db_data = self._get_operations_data()
 
         color_dict = self.COLORS_DICT
         
@@ -240,40 +383,154 @@ class OperationManager:
 
         return result, hyperlinks, colors, comments
     
+    @staticmethod
+    def _job_card_row(columns: list, row: tuple) -> dict:
+        return dict(zip(columns, map(lambda x: str(x) if isinstance(x, datetime) else x, row)))
+
+    @classmethod
+    def _cached_job_cards(cls, drive_ids: list) -> dict:
+        '''
+        Cached cards for ``drive_ids`` that are still current. The cache is
+        per worker, so each hit is checked against the cheap
+        (modified_dttm, operations_version, is_active) columns of job_cards
+        -- the same ones job_card_etag uses -- and dropped if any differ.
+        '''
+        cached = {}
+        for drive_id in drive_ids:
+            job_card = job_card_cache.get(drive_id)
+            if job_card is not None:
+                cached[drive_id] = job_card
+
+        if not cached:
+            return cached
+
+        query = '''
+            SELECT drive_id, modified_dttm, operations_version, is_active
+            FROM job_cards
+            WHERE drive_id = ANY(%s)
+        '''
+
+        with DbManager() as db:
+            rows, description = db.execute_query(query, (list(cached), ), True)
+            columns = [col[0] for col in description]
+
+        current = {row[0]: cls._job_card_row(columns, row) for row in rows}
+
+        stale = [
+            drive_id for drive_id, job_card in cached.items()
+            if current.get(drive_id) != {column: job_card[column] for column in columns}
+        ]
+        if stale:
+            job_card_cache.invalidate(stale)
+
+        return {drive_id: job_card for drive_id, job_card in cached.items() if drive_id not in stale}
+
     def get_job_card_data(self, drive_id):
+        '''job_cards row with its operations, from the worker cache when current; None if unknown.'''
 
-        query = 'SELECT * FROM job_cards WHERE drive_id = %s'
+        job_card = self._cached_job_cards([drive_id]).get(drive_id)
+        if job_card is not None:
+            return job_card
+
+        query = 'SELECT * FROM job_cards_with_operations WHERE drive_id = %s'
 
         with DbManager() as db:
-            job_card, description = db.execute_query(query, (drive_id, ), True)
+            rows, description = db.execute_query(query, (drive_id, ), True)
             columns = [col[0] for col in description] 
-            return dict(zip(columns, map(lambda x: str(x) if isinstance(x, datetime) else x, job_card[0])))
 
+        if not rows:
+            return None
+
+        job_card = self._job_card_row(columns, rows[0])
+        job_card_cache.put(drive_id, job_card)
+        return job_card
+
+    def get_job_cards_data(self, drive_ids: list, operations: list | None = None) -> tuple[dict, list]:
+        '''
+        Several job cards at once: current cached cards plus one ANY query
+        for the rest. Returns ``drive_id -> card`` and the ids that do not
+        exist. With ``operations`` each card only carries those operations.
+        '''
+
+        drive_ids = list(dict.fromkeys(drive_ids))
+        found = self._cached_job_cards(drive_ids)
+
+        missing = [drive_id for drive_id in drive_ids if drive_id not in found]
+
+        if missing:
+            query = 'SELECT * FROM job_cards_with_operations WHERE drive_id = ANY(%s)'
+
+            with DbManager() as db:
+                rows, description = db.execute_query(query, (missing, ), True)
+                columns = [col[0] for col in description]
+
+            for row in rows:
+                job_card = self._job_card_row(columns, row)
+                job_card_cache.put(job_card['drive_id'], job_card)
+                found[job_card['drive_id']] = job_card
+
+        if operations is not None:
+            found = {
+                drive_id: {
+                    **job_card,
+                    'operations': {
+                        name: node for name, node in (job_card['operations'] or {}).items() if name in operations
+                    },
+                }
+                for drive_id, job_card in found.items()
+            }
+
+        return found, [drive_id for drive_id in drive_ids if drive_id not in found]
 
     def get_single_operation_data(self, drive_id, operation):
 
-        db_operations = self.get_job_card_data(drive_id)['operations']
+        job_card = self.get_job_card_data(drive_id)
 
-        if db_operations:
-            single_operation_data = db_operations.get(operation)
+        if job_card and job_card['operations']:
+            return job_card['operations'].get(operation)
 
-            if single_operation_data:
-                return single_operation_data
+def job_card_etag(job_card: dict) -> str:
+    '''
+    Validator for a job card read. Sync writes change modified_dttm (or
+    is_active), API writes bump operations_version, so the tag changes
+    whenever the returned data can.
+    '''
+    return '{}-{}-{}-{}'.format(
+        job_card['drive_id'],
+        job_card['modified_dttm'].replace(' ', 'T'),
+        job_card['operations_version'],
+        int(job_card['is_active']),
+    )
+
+def _column_letter(col: int) -> str:
+    letters = ''
+    while col:
+        col, remainder = divmod(col - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
 
 class JobCard:
 
+    SHEET_NAME = 'JC'
+
     VALUES_MAP = {
         'name' : '7_1',
         'part_number' : '9_1',
         'serial_number' : '9_7',
         'project' : '5_7'
     }
+
+    PARSER = JobCardParser(VALUES_MAP)
     
-    def __init__(self, drive_id: str, project: str, modified_time: datetime =None ):
+    def __init__(self, drive_id: str, project: str, modified_time: datetime =None, rate_limiter: RateLimiter = None,
+                 md5_checksum: str = None):
         self.drive_id = drive_id
         self.project = project
         self._modified_time = modified_time
-        self._data_cache = None
+        self.md5_checksum = md5_checksum   # Drive only has it for uploaded files (XLSX)
+        self._rate_limiter = rate_limiter
+        self._rows = None
+        self._header = None
         self._extracted_operations = None
         self._google_api = GoogleApiService()
         self._sheets_service = self._google_api.sheets_service
@@ -281,10 +538,19 @@ class JobCard:
 
     def get_mapping(self, key):
         return self.VALUES_MAP.get(key)
+
+    def _throttle(self):
+        if self._rate_limiter:
+            self._rate_limiter.acquire()
+
+    def is_job_card(self) -> bool:
+        '''Sheet has the fields job_cards requires (NOT NULL columns).'''
+        return bool(self.header['name'] and self.header['part_number'])
     
     @property
     def modified_time(self):
         if self._modified_time is None:
+            self._throttle()
             file_metadata = self._drive_service.files().get(
                 fileId=self.drive_id,
                 fields='modifiedTime'
@@ -293,508 +559,792 @@ class JobCard:
         return self._modified_time
           
     @property
-    def data(self) -> dict:
-        '''
-        Download and parse GoogleSheet job card file.
-        Returns dict with rowIndex_colIndex as key and value.
-        '''
-        if self._data_cache is None:
+    def rows(self) -> list:
+        '''Download GoogleSheet job card file as a list of rows.'''
+        if self._rows is None:
 
+            self._throttle()
             try:
-                values = self._sheets_service.spreadsheets().values().get(
-                    spreadsheetId=self.drive_id,
-                    range='JC'
-                ).execute().get('values', [])
+                if settings.JOB_CARD_FETCH_MODE == 'targeted':
+                    values = self._fetch_targeted_values()
+                else:
+                    values = self._fetch_full_values()
             except HttpError as error:
-                if error.status_code == 400:
-                    values = self._convert_xlsx_to_sheets()
-
-            result = {}
-            for row_idx, row in enumerate(values, start=1):
-                for col_idx, value in enumerate(row, start=1):
-                    result[f'{row_idx}_{col_idx}'] = value if value else None
-            
-            self._data_cache = result  
-        return self._data_cache
+                if error.status_code != 400:
+                    raise
+                # Not a native Google Sheet (uploaded XLSX)
+                self._throttle()
+                values = self._convert_xlsx_to_sheets()
+
+            self._rows = values
+        return self._rows
+
+    @property
+    def header(self) -> dict:
+        '''VALUES_MAP fields (name, part_number, ...) read from the job card rows.'''
+        if self._header is None:
+            self._header = self.PARSER.header(self.rows)
+        return self._header
+
+    def _fetch_full_values(self) -> list:
+        return self._sheets_service.spreadsheets().values().get(
+            spreadsheetId=self.drive_id,
+            range=self.SHEET_NAME
+        ).execute().get('values', [])
+
+    def _targeted_ranges(self) -> list[tuple[int, int, str]]:
+        '''(row, col, A1 range) for column A and every VALUES_MAP cell outside it.'''
+        ranges = [(1, 1, f'{self.SHEET_NAME}!A:A')]
+        for key in self.VALUES_MAP.values():
+            row, col = map(int, key.split('_'))
+            if col != 1:
+                ranges.append((row, col, f'{self.SHEET_NAME}!{_column_letter(col)}{row}'))
+        return ranges
+
+    def _fetch_targeted_values(self) -> list:
+        '''
+        Fetch only column A and the VALUES_MAP cells with one batchGet and
+        lay them out as the same row/column grid the full fetch returns.
+        Any error other than 400 (not a Google Sheet) falls back to the
+        full "JC" fetch.
+        '''
+        ranges = self._targeted_ranges()
+
+        try:
+            value_ranges = self._sheets_service.spreadsheets().values().batchGet(
+                spreadsheetId=self.drive_id,
+                ranges=[a1 for _, _, a1 in ranges],
+                fields='valueRanges(values)'
+            ).execute().get('valueRanges', [])
+        except HttpError as error:
+            if error.status_code == 400:
+                raise
+            logger.warning('targeted fetch failed for %s, using full fetch: %s', self.drive_id, error)
+            self._throttle()
+            return self._fetch_full_values()
+
+        grid = {}
+        for (start_row, col, _), value_range in zip(ranges, value_ranges):
+            for row_offset, row in enumerate(value_range.get('values', [])):
+                if row:
+                    grid[(start_row + row_offset, col)] = row[0]
+
+        if not grid:
+            return []
+
+        values = [[] for _ in range(max(row for row, _ in grid))]
+        for (row, col), value in grid.items():
+            cells = values[row - 1]
+            cells.extend([''] * (col - len(cells)))
+            cells[col - 1] = value
+
+        return values
     
     def _convert_xlsx_to_sheets(self):
-
-        # Download file bytes
+        '''
+        Read an uploaded XLSX job card. The file is streamed into a spooled
+        temp file and opened in read-only mode; only columns up to the last
+        VALUES_MAP column are read, and reading stops at the "End date" row
+        once all header cells are passed.
+        '''
         request = self._drive_service.files().get_media(fileId=self.drive_id)
-        fh = io.BytesIO()
-        downloader = MediaIoBaseDownload(fh, request)
 
-        done = False
-        while not done:
-            status, done = downloader.next_chunk()
+        with tempfile.SpooledTemporaryFile(max_size=settings.XLSX_SPOOL_MAX_BYTES) as fh:
+            downloader = MediaIoBaseDownload(fh, request)
 
-        fh.seek(0)
+            done = False
+            while not done:
+                status, done = downloader.next_chunk()
 
-        # Load workbook from bytes
-        wb = load_workbook(filename=fh, data_only=True)
-        ws = wb.active  # first sheet
+            fh.seek(0)
 
-        # Extract rows as list of lists
-        data = []
-        for row in ws.iter_rows(values_only=True):
-            data.append(list(row))
+            wb = load_workbook(filename=fh, read_only=True, data_only=True)
+            try:
+                data = []
+                end_found = False
+                rows = wb.active.iter_rows(max_col=self.PARSER.max_col, values_only=True)
+                for row_idx, row in enumerate(rows, start=1):
+                    # Sheets API returns formatted strings, keep the same type here
+                    data.append([str(value) if value is not None else None for value in row])
+
+                    if row and self.PARSER.is_end(row[0]):
+                        end_found = True
+                    if end_found and row_idx >= self.PARSER.last_header_row:
+                        break
+            finally:
+                wb.close()
 
         return data
         
-    def update_job_card_info(self):
-
-        params = (
-            self.drive_id,
-            self.data.get(self.get_mapping('name')),
-            str(self.modified_time),
-            self.data.get(self.get_mapping('part_number')),
-            self.data.get(self.get_mapping('serial_number')),
-            str(self.modified_time),
-            self.operations_produce(),
-            self.project,
-            True,
+    def record(self) -> tuple:
+        '''
+        Rows for JobCardsReconciler.apply: the job_cards row
+        (JOB_CARDS_COLUMNS order) and the card's operation names in sheet order.
+        '''
+        return (
+            (
+                self.drive_id,
+                self.header['name'],
+                self.modified_time,
+                self.header['part_number'],
+                self.header['serial_number'],
+                self.modified_time,
+                self.project,
+                True,
+                self.md5_checksum,
+            ),
+            list(json.loads(self.extracted_operations)),
         )
 
-        placeholders = ','.join(['%s'] * len(params))
-
-        update_query = f'''
-                        INSERT INTO job_cards (
-                            drive_id, 
-                            name, 
-                            creation_dttm, 
-                            part_number, 
-                            serial_number, 
-                            modified_dttm, 
-                            operations,
-                            project, 
-                            is_active) 
-                        VALUES ({placeholders})
-                        ON CONFLICT(drive_id) DO UPDATE SET 
-                            name = excluded.name,
-                            part_number = excluded.part_number,
-                            serial_number = excluded.serial_number,
-                            modified_dttm = excluded.modified_dttm,
-                            operations = excluded.operations,
-                            project = excluded.project,
-                            is_active = excluded.is_active;
-                    '''
+    def update_job_card_info(self):
 
-        with DbManager() as db:
-            db.execute_query(update_query, params)
+        JobCardsReconciler().apply([self.record()])
     
+    @property
+    def parsed(self) -> dict:
+        '''VALUES_MAP fields and extracted operations, as kept in ParsedCardCache.'''
+        return {
+            'header': self.header,
+            'operations': self.extracted_operations,
+        }
+
+    def load_parsed(self, parsed: dict):
+        '''Use a ParsedCardCache entry instead of reading the sheet.'''
+        self._header = {key: parsed['header'].get(key) for key in self.VALUES_MAP}
+        self._extracted_operations = parsed['operations']
+
     @property    
     def extracted_operations(self) -> str:
 
         if self._extracted_operations is None:
+            self._extracted_operations = json.dumps(self.PARSER.operations(self.rows))
 
-            operations = {}
-            operation_fields = {
-                'start_dttm' : None,
-                'end_dttm' : None,
-                'comment' : None,
-                'user' : None,
-                'used_mnhrs': None
-            }
-            collection = False
+        return self._extracted_operations
+    
+class JobCardsReconciler:
+    '''
+    Database side of the Drive sync.
 
-            for idx in filter(lambda x: x.endswith('_1'), self.data):
+    Existing rows are read once, compared with the Drive listing using
+    dicts/sets, and all upserts and deactivations are written in a single
+    transaction: rows are COPY-ed into a temp staging table and merged
+    with one INSERT ... ON CONFLICT.
+    '''
 
-                value = self.data[idx]
+    JOB_CARDS_COLUMNS = (
+        'drive_id', 
+        'name', 
+        'creation_dttm', 
+        'part_number', 
+        'serial_number', 
+        'modified_dttm', 
+        'project', 
+        'is_active',
+        'content_md5'
+    )
 
-                if not value:
-                    continue
+    def prefetch(self) -> dict:
+        '''drive_id -> (modified_dttm, is_active, content_md5) for every row in job_cards.'''
 
-                if re.search('End date', value):
-                    break
+        query = 'SELECT drive_id, modified_dttm, is_active, content_md5 FROM job_cards'
 
-                if collection:
-                    value = str(value).replace('\n', '')
-                    operations[value] = operation_fields
-                
-                if re.search('Start date', value):
-                    collection = True
+        with DbManager() as db:
+            rows, _ = db.execute_query(query, fetch_results=True)
+
+        return {row[0]: tuple(row[1:]) for row in rows}
 
-            operations['PPK'] = operation_fields
+    @staticmethod
+    def stale(files: list, db_rows: dict) -> tuple[list, list]:
+        '''
+        Files that are new, modified since the last sync or currently
+        inactive, split into files to download and files whose Drive
+        md5Checksum equals the stored one (contents unchanged, only
+        modified_dttm / project / is_active need a touch).
+        '''
+        to_ingest, to_touch = [], []
 
-            self._extracted_operations = json.dumps(operations)
+        for file in files:
+            db_row = db_rows.get(file['id'])
 
-        return self._extracted_operations
-    
-    def operations_produce(self):
+            if db_row and db_row[:2] == (file['modifiedTime'], True):
+                continue
+
+            if db_row and file.get('md5Checksum') and db_row[2] == file['md5Checksum']:
+                to_touch.append(file)
+            else:
+                to_ingest.append(file)
+
+        return to_ingest, to_touch
+
+    def apply(self, records: list, to_set_inactive: list | None = None, to_touch: list | None = None):
         '''
-        Create operations JSON. 
-        If JobCard already in DataBase make compare and
-        keep DataBase stored values.
+        Write ``records`` from JobCard.record. Operations that are new on a
+        card are added empty, operations no longer on the sheet are deleted
+        and existing ones only get their ordinal updated, so values entered
+        through the API are never overwritten by the sync.
         '''
 
-        db_operations_query = 'SELECT operations FROM job_cards WHERE drive_id = %s'
-        
-        with DbManager() as db:
-            db_operations, _ = db.execute_query(db_operations_query, (self.drive_id,), True)
-            try:
-                db_operations = db_operations[0][0]
-            except IndexError:
-                db_operations = None
+        columns = ', '.join(self.JOB_CARDS_COLUMNS)
+        updates = ',\n                '.join(
+            f'{column} = excluded.{column}'
+            for column in self.JOB_CARDS_COLUMNS
+            if column not in ('drive_id', 'creation_dttm')
+        )
 
-        drive_operations = json.loads(self.extracted_operations)
+        # A file listed twice would make ON CONFLICT touch one row twice
+        records = list({row[0]: (row, operations) for row, operations in records}.values())
 
+        with DbManager() as db, db.transaction() as cur:
 
-        if not db_operations or db_operations == drive_operations:
-            return self.extracted_operations
-        
-        result = {}
+            if records:
+                cur.execute(
+                    'CREATE TEMP TABLE job_cards_stage '
+                    '(LIKE job_cards INCLUDING DEFAULTS) ON COMMIT DROP'
+                )
+                cur.execute(
+                    'CREATE TEMP TABLE job_card_operations_stage '
+                    '(drive_id varchar, name varchar, ordinal int4) ON COMMIT DROP'
+                )
 
-        for operation in drive_operations:
-            
-            db_value = db_operations.get(operation)
-            extracted_value = drive_operations.get(operation)
+                with cur.copy(f'COPY job_cards_stage ({columns}) FROM STDIN') as copy:
+                    for row, _ in records:
+                        copy.write_row(row)
+
+                with cur.copy('COPY job_card_operations_stage (drive_id, name, ordinal) FROM STDIN') as copy:
+                    for row, operations in records:
+                        for ordinal, name in enumerate(operations):
+                            copy.write_row((row[0], name, ordinal))
+
+                cur.execute(f'''
+                    INSERT INTO job_cards ({columns})
+                    SELECT {columns} FROM job_cards_stage
+                    ON CONFLICT(drive_id) DO UPDATE SET 
+                        {updates}
+                ''')
+
+                cur.execute('''
+                    DELETE FROM job_card_operations o
+                    USING job_cards_stage jc
+                    WHERE o.drive_id = jc.drive_id
+                      AND NOT EXISTS (
+                          SELECT 1 FROM job_card_operations_stage s
+                          WHERE s.drive_id = o.drive_id AND s.name = o.name
+                      )
+                ''')
+
+                cur.execute('''
+                    INSERT INTO job_card_operations (drive_id, name, ordinal)
+                    SELECT drive_id, name, ordinal FROM job_card_operations_stage
+                    ON CONFLICT(drive_id, name) DO UPDATE SET
+                        ordinal = excluded.ordinal
+                    WHERE job_card_operations.ordinal <> excluded.ordinal
+                ''')
+
+            if to_touch:
+                cur.execute(
+                    '''
+                    UPDATE job_cards
+                    SET modified_dttm = t.modified_dttm,
+                        project = t.project,
+                        is_active = True
+                    FROM unnest(%s::varchar[], %s::timestamp[], %s::varchar[]) AS t(drive_id, modified_dttm, project)
+                    WHERE job_cards.drive_id = t.drive_id
+                    ''',
+                    (
+                        [file['id'] for file in to_touch],
+                        [file['modifiedTime'] for file in to_touch],
+                        [file['project'] for file in to_touch],
+                    )
+                )
 
-            if db_value:
-                result[operation] = db_value
-            else:
-                result[operation] = extracted_value
+            if to_set_inactive:
+                cur.execute(
+                    'UPDATE job_cards SET is_active = False WHERE drive_id = ANY(%s)',
+                    (list(to_set_inactive),)
+                )
 
-        return json.dumps(result)
+        job_card_cache.invalidate(
+            [row[0] for row, _ in records]
+            + [file['id'] for file in to_touch or []]
+            + list(to_set_inactive or [])
+        )
 
-def update_db_job_cards_info():
+class ParsedCardCache:
     '''
-    Function for check difference in Google drive folder modified time
-    and DataBase modified time. If difference exists, triggers update
-    job card info in DataBase.
+    Parsed job cards (JobCard.parsed) keyed by (drive_id, modified_dttm).
+
+    A file whose modifiedTime has not changed parses to the same result,
+    so re-activated cards and re-runs after a failed sync are served from
+    here instead of Google. Least recently used entries are evicted once
+    the total size exceeds PARSE_CACHE_MAX_BYTES.
     '''
 
-    PROJECTS_FOLDER = '1pu8ssI1HI_5k8ewhufrO8HcoLDon2jVR'
-    _google_api = GoogleApiService()
+    def get_many(self, files: list) -> dict:
+        '''drive_id -> parsed entry for the files that have a cache hit.'''
+
+        if not files:
+            return {}
+
+        query = '''
+            UPDATE job_card_parse_cache c
+            SET accessed_dttm = %s
+            FROM unnest(%s::varchar[], %s::timestamp[]) AS k(drive_id, modified_dttm)
+            WHERE c.drive_id = k.drive_id AND c.modified_dttm = k.modified_dttm
+            RETURNING c.drive_id, c.header, c.operations
+        '''
+
+        params = (
+            datetime.now(),
+            [file['id'] for file in files],
+            [file['modifiedTime'] for file in files],
+        )
+
+        with DbManager() as db:
+            rows, _ = db.execute_query(query, params, fetch_results=True)
+
+        return {
+            drive_id: {'header': header, 'operations': json.dumps(operations)}
+            for drive_id, header, operations in rows
+        }
+
+    def put_many(self, entries: list, evict: bool = True):
+        '''Store (drive_id, modified_dttm, parsed) entries.'''
 
-    in_work_folders = []
-    job_cards_list = []
-    current_db_data_query = 'SELECT drive_id, modified_dttm, is_active FROM job_cards'
+        if not entries:
+            return
+
+        now = datetime.now()
+        params = []
+        for drive_id, modified_dttm, parsed in entries:
+            header = json.dumps(parsed['header'])
+            params.append((
+                drive_id,
+                modified_dttm,
+                header,
+                parsed['operations'],
+                len(header) + len(parsed['operations']),
+                now,
+            ))
+
+        with DbManager() as db, db.transaction() as cur:
+            cur.executemany(
+                '''
+                INSERT INTO job_card_parse_cache (
+                    drive_id,
+                    modified_dttm,
+                    header,
+                    operations,
+                    size_bytes,
+                    accessed_dttm)
+                VALUES (%s, %s, %s::json, %s::json, %s, %s)
+                ON CONFLICT(drive_id, modified_dttm) DO UPDATE SET
+                    header = excluded.header,
+                    operations = excluded.operations,
+                    size_bytes = excluded.size_bytes,
+                    accessed_dttm = excluded.accessed_dttm
+                ''',
+                params
+            )
+            # Older versions of the same files can never be hit again
+            cur.execute(
+                '''
+                DELETE FROM job_card_parse_cache c
+                USING unnest(%s::varchar[], %s::timestamp[]) AS k(drive_id, modified_dttm)
+                WHERE c.drive_id = k.drive_id AND c.modified_dttm < k.modified_dttm
+                ''',
+                ([entry[0] for entry in entries], [entry[1] for entry in entries])
+            )
+
+        if evict:
+            self.evict()
+
+    def evict(self):
+        '''Drop least recently used entries beyond PARSE_CACHE_MAX_BYTES.'''
+
+        with DbManager() as db:
+            db.execute_query(
+                '''
+                DELETE FROM job_card_parse_cache c
+                USING (
+                    SELECT drive_id, modified_dttm,
+                           sum(size_bytes) OVER (ORDER BY accessed_dttm DESC, drive_id, modified_dttm) AS running_size
+                    FROM job_card_parse_cache
+                ) r
+                WHERE c.drive_id = r.drive_id
+                  AND c.modified_dttm = r.modified_dttm
+                  AND r.running_size > %s
+                ''',
+                (settings.PARSE_CACHE_MAX_BYTES,)
+            )
+
+SYNC_STATE_CHANGES_TOKEN = 'drive_changes_page_token'
+SYNC_STATE_LAST_FULL_SYNC = 'drive_last_full_sync'
+SYNC_STATE_RETRY_FILES = 'drive_retry_files'     # JSON list of Drive files that failed to ingest
+
+DRIVE_TIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
+
+def _get_sync_state() -> dict:
 
-    projects_folders = _google_api.get_folder_files_info(f"'{PROJECTS_FOLDER}' in parents and trashed = false")
+    with DbManager() as db:
+        rows, _ = db.execute_query('SELECT name, value FROM sync_state', fetch_results=True)
 
-    for parent in projects_folders:
-        project = parent['name']
-        temp_folders = _google_api.get_folder_files_info(f"'{parent['id']}' in parents and mimeType='application/vnd.google-apps.folder' and name contains 'in_work'")
-        in_work_folders.extend(list(map(lambda x: x | {'project' : project}, temp_folders)))
+    return dict(rows)
 
-    for folder in in_work_folders:
-        project = folder['project']
-        temp_folders = _google_api.get_folder_files_info(f"'{folder['id']}' in parents and trashed = false")
-        job_cards_list.extend(list(map(lambda x: x | {'project' : project}, temp_folders)))
+def _save_sync_state(values: dict):
+
+    query = '''
+        INSERT INTO sync_state (name, value, updated_dttm)
+        VALUES (%s, %s, %s)
+        ON CONFLICT(name) DO UPDATE SET
+            value = excluded.value,
+            updated_dttm = excluded.updated_dttm
+    '''
 
     with DbManager() as db:
-        db_response, columns = db.execute_query(current_db_data_query, fetch_results=True)
-        db_dict = {row[0] : {'modifiedTime' : row[1], 'is_active' : row[2]} for row in db_response}
+        for name, value in values.items():
+            db.execute_query(query, (name, value, datetime.now()))
 
-    to_update_job_cards = []
+def _full_sync_due(state: dict) -> bool:
 
-    for file in job_cards_list:
+    if not state.get(SYNC_STATE_CHANGES_TOKEN) or not state.get(SYNC_STATE_LAST_FULL_SYNC):
+        return True
 
-        file['modifiedTime'] = datetime.strptime(file['modifiedTime'], '%Y-%m-%dT%H:%M:%S.%fZ')
+    last_full_sync = datetime.fromisoformat(state[SYNC_STATE_LAST_FULL_SYNC])
+    return (datetime.now() - last_full_sync).total_seconds() >= settings.DRIVE_FULL_SYNC_INTERVAL_HOURS * 3600
 
-        try:
-            db_instance = db_dict.get(file['id'])
-            db_instance_modified_time, db_instance_is_active = db_instance.get('modifiedTime'), db_instance.get('is_active')
-        except AttributeError:
-            to_update_job_cards.append(file)
-            continue
+def _ingest_job_card(file: dict, parsed_cache: dict, rate_limiter: RateLimiter) -> tuple:
 
-        if db_instance_modified_time != file['modifiedTime'] or not db_instance_is_active:
-            to_update_job_cards.append(file)
+    jc = JobCard(file['id'], file['project'], file['modifiedTime'], rate_limiter=rate_limiter,
+                 md5_checksum=file.get('md5Checksum'))
 
-    #print(f'to update: {to_update_job_cards}')
+    cached = parsed_cache.get(file['id'])
+    if cached:
+        jc.load_parsed(cached)
+    else:
+        # Stored right away so a run that dies halfway is cheap to repeat
+        ParsedCardCache().put_many([(file['id'], file['modifiedTime'], jc.parsed)], evict=False)
 
-    for file in to_update_job_cards:
-        jc = JobCard(file['id'], file['project'], file['modifiedTime'])
-        try:
-            jc.update_job_card_info()
-        except HttpError:
-            print(f'failed: {file}')
+    if not jc.is_job_card():
+        return SKIPPED, None
 
-    
-    drive_ids = tuple(map(lambda x: x['id'], job_cards_list))
-    to_set_inactive = [file_id for file_id in db_dict if file_id not in drive_ids]
-
-    if to_set_inactive:
-        placeholders = ','.join(['%s'] * len(to_set_inactive))
-        inactive_query = f'''
-            UPDATE job_cards
-            SET is_active = False
-            WHERE drive_id IN ({placeholders})
-        '''
-        with DbManager() as db:
-            db.execute_query(inactive_query, tuple(to_set_inactive))
+    return SUCCESS, jc.record()
 
-    #print(f'to inactive: {to_set_inactive}')
+@advisory_lock(SYNC_LOCK)
+def update_db_job_cards_info(full: bool | None = None):
+    '''
+    Function for check difference in Google drive folder modified time
+    and DataBase modified time. If difference exists, triggers update
+    job card info in DataBase.
 
-def _get_master_table_sheet_id():
+    By default only files reported by the Drive changes feed since the
+    previous run are checked. A full crawl of PROJECTS_FOLDER runs when
+    ``full`` is True, when no page token is stored yet, when the last full
+    crawl is older than DRIVE_FULL_SYNC_INTERVAL_HOURS, or when the feed
+    contains folder changes. Files that fail to ingest are kept in
+    sync_state and retried by the next incremental run, since the feed
+    will not report them again.
+    '''
 
-    sheets_service = GoogleApiService().sheets_service
+    PROJECTS_FOLDER = '1pu8ssI1HI_5k8ewhufrO8HcoLDon2jVR'
 
-    sheet_metadata = sheets_service.spreadsheets().get(
-        spreadsheetId=MASTER_SPREADSHEET_ID,
-        fields="sheets(properties(sheetId,title))"
-    ).execute()
+    state = _get_sync_state()
+    feed = DriveChangesFeed(GoogleApiService)
+    crawler = DriveCrawler(GoogleApiService, PROJECTS_FOLDER, settings.DRIVE_CRAWL_CONCURRENCY)
+    changes = []
+    retry_files = []
 
-    return next(
-        sheet['properties']['sheetId'] 
-        for sheet in sheet_metadata['sheets']
-        if sheet['properties']['title'] == 'master'
-    )
+    if full is None:
+        full = _full_sync_due(state)
 
+    if not full:
+        try:
+            changes, next_page_token = feed.changes(state[SYNC_STATE_CHANGES_TOKEN])
+        except HttpError as error:
+            logger.warning('drive changes feed failed, falling back to full crawl: %s', error)
+            full = True
+        else:
+            job_cards_list, gone_ids, full = classify_changes(changes, crawler.list_in_work_folders())
+
+            # A newer change for the same file, or its removal, supersedes the retry
+            listed_ids = {file['id'] for file in job_cards_list} | set(gone_ids)
+            retry_files = [
+                file for file in json.loads(state.get(SYNC_STATE_RETRY_FILES) or '[]')
+                if file['id'] not in listed_ids
+            ]
+            job_cards_list += retry_files
+
+    if full:
+        # Token is taken before the crawl so edits made during it are replayed next run
+        next_page_token = feed.start_page_token()
+        job_cards_list = crawler.crawl()
+        retry_files = []
+
+    logger.info('drive crawl timings: %s', crawler.timings)
+
+    reconciler = JobCardsReconciler()
+    db_rows = reconciler.prefetch()
 
-def update_google_master_table():
+    for file in job_cards_list:
+        file['modifiedTime'] = datetime.strptime(file['modifiedTime'], DRIVE_TIME_FORMAT)
 
-    sheets_service = GoogleApiService().sheets_service
-    sheets_data, hyperlink_map, colors, comments = OperationManager().create_sheets_dataset()
+    to_update_job_cards, to_touch_job_cards = reconciler.stale(job_cards_list, db_rows)
 
-    sheet_id = _get_master_table_sheet_id()
+    parse_cache = ParsedCardCache()
+    parsed_cache = parse_cache.get_many(to_update_job_cards)
 
-    values = []
-    for row in sheets_data:
-        sheets_row = []
-        for cell in row:
-            sheets_row.append({"userEnteredValue": {"stringValue": str(cell)}} if cell is not None else {})
-        values.append(sheets_row)
+    ingest_summary, records = run_ingestion(
+        to_update_job_cards,
+        partial(
+            _ingest_job_card,
+            parsed_cache=parsed_cache,
+            rate_limiter=RateLimiter(settings.GOOGLE_API_RATE_LIMIT)
+        ),
+        settings.SYNC_INGEST_WORKERS,
+    )
+    ingest_summary['cache_hits'] = len(parsed_cache)
+    logger.info('job card ingestion: %s', ingest_summary)
 
-    requests = [
-        {
-            "updateCells": {
-                "range": {"sheetId": sheet_id},
-                "fields": "userEnteredValue,userEnteredFormat.backgroundColor,userEnteredFormat.textFormat.foregroundColor,note"
-                }
-        },
-        # 1. Update all cell values
-        {
-            "updateCells": {
-                "range": {
-                    "sheetId": sheet_id,
-                    "startRowIndex": 0,
-                    "endRowIndex": len(sheets_data),
-                    "startColumnIndex": 0,
-                    "endColumnIndex": max([len(row) for row in sheets_data]) if sheets_data else 0
-                },
-                "rows": [
-                        {
-                            "values": [
-                                {"userEnteredValue": {"stringValue": str(cell)}}
-                                for cell in row
-                            ]
-                        }
-                        for row in sheets_data
-                    ],
-                "fields": "userEnteredValue"
-            }
-        },
-        # 2. Apply operation colors
-        *[{
-            "repeatCell": {
-                "range": {
-                    "sheetId": sheet_id,
-                    "startRowIndex": row_idx,
-                    "endRowIndex": row_idx + 1,
-                    "startColumnIndex": col_idx,
-                    "endColumnIndex": col_idx + 1
-                },
-                "cell": {
-                    "userEnteredFormat": {
-                        "backgroundColor": color
-                    }
-                },
-                "fields": "userEnteredFormat.backgroundColor"
-            }
-        } for (row_idx, col_idx), color in colors.items()],
-        # 3. Add name hyperlinks
-        *[{
-            "repeatCell": {
-                "range": {
-                    "sheetId": sheet_id,
-                    "startRowIndex": row_idx,
-                    "endRowIndex": row_idx + 1,
-                    "startColumnIndex": col_idx,
-                    "endColumnIndex": col_idx + 1
-                },
-                "cell": {
-                    "userEnteredValue": {
-                        "formulaValue": f'=HYPERLINK("{url[1]}"; "{url[0]}")'
-                    },
-                    "userEnteredFormat": {
-                        "textFormat": {
-                            "foregroundColor": {"red": 0.0, "green": 0.0, "blue": 1.0},
-                            "underline": True
-                        }
-                    }
-                },
-                "fields": "userEnteredValue,userEnteredFormat.textFormat"
-                }
-        } for (row_idx, col_idx), url in hyperlink_map.items()],
-            # 4) notes from `comments` dict
-        *[{
-            "repeatCell": {
-                "range": {
-                    "sheetId": sheet_id,
-                    "startRowIndex": row_idx,
-                    "endRowIndex": row_idx + 1,
-                    "startColumnIndex": col_idx,
-                    "endColumnIndex": col_idx + 1
-                },
-                "cell": {"note": str(note)},
-                "fields": "note"
-            }
-        } for (row_idx, col_idx), note in comments.items()]
+
+    if full:
+        to_set_inactive = db_rows.keys() - {file['id'] for file in job_cards_list}
+    else:
+        to_set_inactive = {file_id for file_id in gone_ids if file_id in db_rows}
+    to_set_inactive = [file_id for file_id in to_set_inactive if db_rows[file_id][1]]
+
+    reconciler.apply(records, to_set_inactive, to_touch_job_cards)
+    parse_cache.evict()
+
+    failed_ids = {failure['id'] for failure in ingest_summary['failures']}
+    failed_files = [
+        {**file, 'modifiedTime': file['modifiedTime'].strftime(DRIVE_TIME_FORMAT)}
+        for file in to_update_job_cards if file['id'] in failed_ids
     ]
- 
-    sheets_service.spreadsheets().batchUpdate(
-        spreadsheetId=MASTER_SPREADSHEET_ID,
-        body={"requests": requests}
-    ).execute()
 
-def color_master_table_cell(row: int, col: int, status: str = None):
+    sync_state = {
+        SYNC_STATE_CHANGES_TOKEN: next_page_token,
+        SYNC_STATE_RETRY_FILES: json.dumps(failed_files),
+    }
+    if full:
+        sync_state[SYNC_STATE_LAST_FULL_SYNC] = datetime.now().isoformat()
+    _save_sync_state(sync_state)
+
+    return {
+        'mode': 'full' if full else 'incremental',
+        'changes': len(changes),
+        'retried': len(retry_files),
+        'retry_next': len(failed_files),
+        'crawl': crawler.timings,
+        'ingest': ingest_summary,
+        'unchanged_content': len(to_touch_job_cards),
+        'deactivated': len(to_set_inactive),
+    }
+
+MASTER_SHEET_NAME = 'master'
+PROJECTS_SHEET_NAME = 'projects'
 
+_sheet_id_cache: SheetIdCache | None = None
+
+def get_sheet_id_cache() -> SheetIdCache:
+
+    global _sheet_id_cache
+
+    if _sheet_id_cache is None:
+        _sheet_id_cache = SheetIdCache(
+            lambda: GoogleApiService().sheets_service,
+            MASTER_SPREADSHEET_ID,
+            settings.SHEET_ID_CACHE_TTL
+        )
+    return _sheet_id_cache
+
+def _get_master_table_sheet_id():
+    return get_sheet_id_cache().get(MASTER_SHEET_NAME)
+
+def _batch_update_sheets(sheet_titles: list, make_requests):
+    '''
+    Run ``make_requests({title: sheet_id})`` as one batchUpdate on the
+    master spreadsheet. If Google rejects a cached sheetId (sheet was
+    deleted and re-created), the cache is dropped and the call is retried
+    once.
+    '''
+    cache = get_sheet_id_cache()
     sheets_service = GoogleApiService().sheets_service
-    sheet_id = _get_master_table_sheet_id()
-    white = {"red": 1.0, "green": 1.0, "blue": 1.0}
 
-    body = {
-    "requests": [
-        {
-            "repeatCell": {
-                "range": {
-                    "sheetId": sheet_id,
-                    "startRowIndex": row - 1,
-                    "endRowIndex": row,
-                    "startColumnIndex": col - 1,
-                    "endColumnIndex": col
-                },
-                "cell": {
-                    "userEnteredFormat": {
-                        "backgroundColor": OperationManager.COLORS_DICT.get(status, white) if status else white
-                    }
-                },
-                "fields": "userEnteredFormat.backgroundColor"
-                }
-            }
-        ]
-    }
+    for attempt in range(2):
+        sheet_ids = {title: cache.get(title) for title in sheet_titles}
+        try:
+            return sheets_service.spreadsheets().batchUpdate(
+                spreadsheetId=MASTER_SPREADSHEET_ID,
+                body={"requests": make_requests(sheet_ids)}
+            ).execute()
+        except HttpError as error:
+            if attempt or not is_invalid_sheet_id_error(error):
+                raise
+            cache.invalidate()
 
-    sheets_service.spreadsheets().batchUpdate(
-        spreadsheetId=MASTER_SPREADSHEET_ID,
-        body=body
-    ).execute()
+def _batch_update(sheet_title: str, make_requests):
+    '''Single-sheet ``_batch_update_sheets``; ``make_requests`` gets the sheet id.'''
+    return _batch_update_sheets([sheet_title], lambda sheet_ids: make_requests(sheet_ids[sheet_title]))
 
-def convert_dttm(dttm: str) -> datetime:
+def _get_render_state(sheet_name: str) -> dict | None:
 
-    try:
-        return datetime.strptime(dttm, '%Y-%m-%dT%H:%M')
-    except ValueError:
-        pass
+    query = 'SELECT sheet_id, cells FROM sheet_render_state WHERE sheet_name = %s'
 
-    try:
-        return datetime.strptime(dttm, '%Y-%m-%dT%H:%M:%S.%fZ')
-    except ValueError:
-        pass
+    with DbManager() as db:
+        rows, _ = db.execute_query(query, (sheet_name,), fetch_results=True)
+
+    return {'sheet_id': rows[0][0], 'cells': rows[0][1]} if rows else None
 
-def _make_project_rows_for_sheets(project_data: list[dict]) -> list[list]:
+def _save_render_state(sheet_name: str, sheet_id: int, cells: dict):
 
-    result = []
-    last_project_operation = None
-    closed_job_cards = 0
-    groups = ['COAT', 'MECH', 'OTK', 'NDT', 'CEX_TO', 'OUT', 'PPK']
-    stats_dict =  {'in_work' : 0, 'closed' : 0, 'to_do' : 0}
-    now = datetime.now()
+    query = '''
+        INSERT INTO sheet_render_state (sheet_name, sheet_id, cells, rendered_dttm)
+        VALUES (%s, %s, %s::json, %s)
+        ON CONFLICT(sheet_name) DO UPDATE SET
+            sheet_id = excluded.sheet_id,
+            cells = excluded.cells,
+            rendered_dttm = excluded.rendered_dttm
+    '''
 
-    project_stats = {group : stats_dict.copy() for group in groups}
+    with DbManager() as db:
+        db.execute_query(query, (sheet_name, sheet_id, json.dumps(cells), datetime.now()))
 
-    for job_card in project_data:
-        
-        job_card_stats = {group : stats_dict.copy() for group in groups}
-        operations = job_card.get('operations')
-        all_dttms = [convert_dttm(v[key])
-                            for v in operations.values()
-                            for key in ('start_dttm', 'end_dttm')
-                            if v[key]]
+class MasterRender:
+    '''
+    One render of the master sheet from ``db_data`` (active job_cards rows).
+
+    ``requests(sheet_id)`` diffs against the render stored in
+    sheet_render_state; a missing state, ``full`` or a state made for
+    another sheetId (sheet re-created) gives a full render. ``summary``
+    describes the requests last built and ``save`` stores the render once
+    they were sent.
+    '''
 
+    def __init__(self, db_data: list | None = None, full: bool = False):
+        sheets_data, hyperlink_map, colors, comments = OperationManager().create_sheets_dataset(db_data)
+
+        self.cells = master_cells(sheets_data, hyperlink_map, colors, comments)
+        self.state = None if full else _get_render_state(MASTER_SHEET_NAME)
+        self.last_update_key = cell_key(0, len(sheets_data[0]) - 1)
+        self.summary = {}
+        self._built = {}
+        self._sheet_id = None
+
+    def is_diff_for(self, sheet_id: int) -> bool:
+        return bool(self.state) and self.state['sheet_id'] == sheet_id
+
+    def requests(self, sheet_id: int) -> list:
+        if sheet_id in self._built:
+            return self._built[sheet_id]
+
+        if self.is_diff_for(sheet_id):
+            changed = diff_cells(self.state['cells'], self.cells, ignore={self.last_update_key})
+            if changed:
+                changed[self.last_update_key] = self.cells[self.last_update_key]
+            requests = cells_update_requests(sheet_id, changed)
+            self.summary = {'mode': 'diff', 'changed_cells': len(changed), 'requests': len(requests)}
+        else:
+            requests = full_render_requests(sheet_id, self.cells)
+            self.summary = {'mode': 'full', 'changed_cells': len(self.cells), 'requests': len(requests)}
+
+        self._built[sheet_id] = requests
+        self._sheet_id = sheet_id
+        return requests
+
+    def save(self):
+        _save_render_state(MASTER_SHEET_NAME, self._sheet_id, self.cells)
+
+@advisory_lock(MASTER_RENDER_LOCK)
+def update_google_master_table(full: bool = False):
+    '''
+    Render the master sheet. The previous render is kept in
+    sheet_render_state; only cells whose value, colour, link or note
+    changed are sent, and nothing is sent if the dataset is unchanged
+    (the "last_update" stamp alone does not count). ``full`` or a missing
+    or foreign state re-renders the whole sheet.
+    '''
 
-        last_operation = max(all_dttms) if all_dttms else None
+    # queued colour/note writes must not land on top of the fresh render
+    get_sheet_write_queue().flush()
 
-        if not last_project_operation and last_operation:
-            last_project_operation = last_operation
-        elif last_operation and last_operation > last_project_operation:
-            last_project_operation = last_operation
+    render = MasterRender(full=full)
+    sheet_id = _get_master_table_sheet_id()
 
-        for op in operations:
+    if render.is_diff_for(sheet_id) and not render.requests(sheet_id):
+        return render.summary
 
-            try:
-                op_name = op if op == 'PPK' else re.sub(r'^\d+_', '', op)
-            except IndexError:
-                continue
+    _batch_update(MASTER_SHEET_NAME, render.requests)
+    render.save()
 
-            if operations[op]['end_dttm']:
+    return render.summary
 
-                job_card_stats[op_name]['closed'] += 1
-                project_stats[op_name]['closed'] += 1
+_sheet_write_queue: SheetWriteQueue | None = None
 
-                if op_name == 'PPK':
-                    closed_job_cards +=1
+def get_sheet_write_queue() -> SheetWriteQueue:
 
-            elif operations[op]['start_dttm']:
+    global _sheet_write_queue
 
-                job_card_stats[op_name]['in_work'] += 1
-                project_stats[op_name]['in_work'] += 1
+    if _sheet_write_queue is None:
+        _sheet_write_queue = SheetWriteQueue(
+            lambda cells: _batch_update(MASTER_SHEET_NAME, partial(cell_write_requests, cells=cells)),
+            settings.SHEET_WRITE_WINDOW
+        )
+    return _sheet_write_queue
 
-            else:
+def _queue_master_writes(cells: list, sync: bool = False, **fields) -> dict:
+    '''
+    Queue ``fields`` for 0-based master sheet ``cells``; with ``sync`` the
+    queue is flushed before returning.
+    '''
+    queue = get_sheet_write_queue()
 
-                job_card_stats[op_name]['to_do'] += 1
-                project_stats[op_name]['to_do'] += 1
+    for row_idx, col_idx in cells:
+        queue.put(row_idx, col_idx, **fields)
 
-        result.append([
-            job_card.get('project', ''),
-            job_card.get('name', ''),
-            *['/'.join(map(str, values_dict.values())) for values_dict in job_card_stats.values()],
-            round((now - last_operation).total_seconds() / 3600, 2) if last_operation else ''
-        ])
+    if sync:
+        return {'queued': len(cells), 'flushed': queue.flush()}
+    return {'queued': len(cells), 'pending': queue.pending()}
 
-    project_row = [[
-        project_data[0].get('project'),
-        f'{closed_job_cards}/{len(project_data)}',
-        *['/'.join(map(str, values_dict.values())) for values_dict in project_stats.values()],
-        round((now - last_project_operation).total_seconds() / 3600, 2) if last_project_operation else ''
-    ]]
+def color_master_table_cell(row: int, col: int, status: str = None, sync: bool = False):
 
-    return project_row
+    white = {"red": 1.0, "green": 1.0, "blue": 1.0}
 
-def update_projects_google_sheet():
+    return _queue_master_writes(
+        [(row - 1, col - 1)], sync,
+        color=OperationManager.COLORS_DICT.get(status, white) if status else white
+    )
 
-    now_str = datetime.now(tz=ZoneInfo("Europe/Moscow")).strftime('%d.%m.%Y %H:%M')
+PROJECT_GROUPS = ['COAT', 'MECH', 'OTK', 'NDT', 'CEX_TO', 'OUT', 'PPK']
+
+def _projects_sheet_rows(project_stats: list) -> list:
+    '''
+    Projects sheet grid from ``OperationManager.get_projects_stats``: per
+    project the closed/total job cards, "in_work/closed/to_do" per
+    operation group and hours since the last operation timestamp.
+    '''
+
+    now = datetime.now(tz=ZoneInfo("Europe/Moscow"))      # last_operation is timestamptz
+    now_str = now.strftime('%d.%m.%Y %H:%M')
 
     result = [
-        ['Last update', now_str, 'COAT', 'MECH', 'OTK', 'NDT', 'CEX_TO', 'OUT', 'PPK', 'HOURS_FROM_LAST_OP']
+        ['Last update', now_str, *PROJECT_GROUPS, 'HOURS_FROM_LAST_OP']
     ]
-    sheets_service = GoogleApiService().sheets_service
-    job_card_data = OperationManager()._get_operations_data()
 
-    sheet_metadata = sheets_service.spreadsheets().get(
-        spreadsheetId=MASTER_SPREADSHEET_ID,
-        fields="sheets(properties(sheetId,title))"
-    ).execute()
+    for project in project_stats:
+        groups = project['groups']
+        last_operation = project['last_operation']
 
-    sheet_id =  next(
-        sheet['properties']['sheetId'] 
-        for sheet in sheet_metadata['sheets']
-        if sheet['properties']['title'] == 'projects'
-    )
+        result.append([
+            project['project'],
+            f"{project['closed_job_cards']}/{project['job_cards']}",
+            *['/'.join(map(str, groups.get(group, (0, 0, 0)))) for group in PROJECT_GROUPS],
+            round((now - last_operation).total_seconds() / 3600, 2) if last_operation else ''
+        ])
 
-    with DbManager() as db:
-        projects, _ = db.execute_query('SELECT DISTINCT project FROM job_cards WHERE is_active = True ORDER BY project', fetch_results=True)
+    return result
 
-    
-    for row in projects:
-        project = row[0]
-        result.extend(
-            _make_project_rows_for_sheets(list(filter(lambda x: x['project'] == project, job_card_data)))
-        )
+def _projects_sheet_requests(sheet_id: int, result: list) -> list:
 
-    requests = [
+    return [
         {
             "updateCells": {
                 "range": {"sheetId": sheet_id},
@@ -825,62 +1375,87 @@ def update_projects_google_sheet():
         }
     ]
 
-    sheets_service.spreadsheets().batchUpdate(
-        spreadsheetId=MASTER_SPREADSHEET_ID,
-        body={"requests": requests}
-    ).execute()
+def update_projects_google_sheet():
 
-def place_note_master_table(row: int, col: int, note:str = None):
+    result = _projects_sheet_rows(OperationManager().get_projects_stats())
 
-    sheets_service = GoogleApiService().sheets_service
+    _batch_update(PROJECTS_SHEET_NAME, lambda sheet_id: _projects_sheet_requests(sheet_id, result))
 
-    body = {
-        "requests": [{
-            "repeatCell": {
-                "range": {
-                    "sheetId": _get_master_table_sheet_id(),
-                    "startRowIndex": row,
-                    "endRowIndex": row + 1,
-                    "startColumnIndex": col,
-                    "endColumnIndex": col + 1
-                },
-                "cell": {"note": note},        # -> null in JSON clears the note
-                "fields": "note"
-            }
-        }]
-    }
-    return sheets_service.spreadsheets().batchUpdate(
-        spreadsheetId=MASTER_SPREADSHEET_ID, body={"requests": body["requests"]}
-    ).execute()
+def refresh(full: bool | None = None, full_render: bool = False):
+    '''
+    db_upd, mstr_upd and prj_upd as one pipeline: sync job cards from
+    Drive, read the active rows and the project aggregates from one
+    snapshot, and write both sheets with a single batchUpdate. Holds the
+    same locks as db_upd and mstr_upd, so it never runs alongside them.
+    Returns each stage's summary and its timing in seconds.
+    '''
 
-def close_job_card_color(row: int):
+    timings = {}
+    started = time.perf_counter()
 
-    sheets_service = GoogleApiService().sheets_service
-    sheet_id = _get_master_table_sheet_id()
+    def lap(stage):
+        nonlocal started
+        now = time.perf_counter()
+        timings[stage] = round(now - started, 3)
+        started = now
 
-    body = {
-    "requests": [
-        {
-            "repeatCell": {
-                "range": {
-                    "sheetId": sheet_id,
-                    "startRowIndex": row - 1,
-                    "endRowIndex": row,
-                    "startColumnIndex": 0,
-                    "endColumnIndex": 5
-                },
-                "cell": {
-                    "userEnteredFormat": {
-                        "backgroundColor": OperationManager.COLORS_DICT.get('completed')
-                    }
-                },
-                "fields": "userEnteredFormat.backgroundColor"
-                }
-            }
-        ]
+    sync = update_db_job_cards_info(full)
+    lap('sync')
+
+    with advisory_lock(MASTER_RENDER_LOCK):
+        get_sheet_write_queue().flush()
+        db_data, project_stats = OperationManager().read_snapshot()
+        lap('read')
+
+        master = MasterRender(db_data, full=full_render)
+        projects = _projects_sheet_rows(project_stats)
+        lap('prepare')
+
+        def make_requests(sheet_ids):
+            return master.requests(sheet_ids[MASTER_SHEET_NAME]) + \
+                _projects_sheet_requests(sheet_ids[PROJECTS_SHEET_NAME], projects)
+
+        _batch_update_sheets([MASTER_SHEET_NAME, PROJECTS_SHEET_NAME], make_requests)
+        master.save()
+        lap('write')
+
+    timings['total'] = round(sum(timings.values()), 3)
+
+    return {
+        'sync': sync,
+        'master': master.summary,
+        'projects': {'rows': len(projects) - 1},
+        'timings': timings,
     }
 
-    sheets_service.spreadsheets().batchUpdate(
-        spreadsheetId=MASTER_SPREADSHEET_ID,
-        body=body
-    ).execute()
+def place_note_master_table(row: int, col: int, note:str = None, sync: bool = False):
+
+    return _queue_master_writes([(row, col)], sync, note=note)    # None clears the note
+
+def close_job_card_color(row: int, sync: bool = False):
+
+    return _queue_master_writes(
+        [(row - 1, col_idx) for col_idx in range(5)], sync,
+        color=OperationManager.COLORS_DICT.get('completed')
+    )
+
+_job_runner: JobRunner | None = None
+
+def get_job_runner() -> JobRunner:
+
+    global _job_runner
+
+    if _job_runner is None:
+        _job_runner = JobRunner(
+            {
+                'db_upd': update_db_job_cards_info,
+                'mstr_upd': update_google_master_table,
+                'prj_upd': update_projects_google_sheet,
+                'refresh': refresh,
+            },
+            settings.BACKGROUND_JOB_WORKERS,
+            settings.BACKGROUND_JOB_TIMEOUT,
+            settings.BACKGROUND_JOB_HEARTBEAT_INTERVAL,
+            settings.BACKGROUND_JOB_HEARTBEAT_TIMEOUT
+        )
+    return _job_runner
@@ -0,0 +1,79 @@
+"""
+Micro-benchmark for JobCardParser on synthetic job cards.
+
+Run from backend/:  python -m benchmarks.bench_job_card_parser
+Compares the compiled row-order parser with the previous dict-scan
+implementation (kept below for reference) on cards of 50-5000 rows.
+"""
+import json
+import re
+import timeit
+
+from app.services.job_card_parser import JobCardParser
+
+VALUES_MAP = {
+    'name' : '7_1',
+    'part_number' : '9_1',
+    'serial_number' : '9_7',
+    'project' : '5_7'
+}
+GROUPS = ['COAT', 'MECH', 'OTK', 'NDT', 'CEX_TO', 'OUT']
+ROW_SIZES = (50, 500, 2000, 5000)
+
+
+def synthetic_rows(n_rows: int, n_cols: int = 12) -> list:
+    rows = [[f'r{r}c{c}' for c in range(n_cols)] for r in range(n_rows)]
+    rows[4][6] = 'Project'
+    rows[6][0] = 'Name'
+    rows[8][0] = 'PN-1'
+    rows[8][6] = 'SN-1'
+    rows[10][0] = 'Start date'
+    for r in range(11, n_rows - 5):
+        rows[r][0] = f'{r}_{GROUPS[r % len(GROUPS)]}\n' if r % 7 else ''
+    rows[n_rows - 5][0] = 'End date'
+    return rows
+
+
+def legacy_operations(rows: list) -> str:
+    data = {}
+    for row_idx, row in enumerate(rows, start=1):
+        for col_idx, value in enumerate(row, start=1):
+            data[f'{row_idx}_{col_idx}'] = value if value else None
+
+    operations = {}
+    operation_fields = dict.fromkeys(JobCardParser.OPERATION_FIELDS)
+    collection = False
+
+    for idx in filter(lambda x: x.endswith('_1'), data):
+        value = data[idx]
+        if not value:
+            continue
+        if re.search('End date', value):
+            break
+        if collection:
+            value = str(value).replace('\n', '')
+            operations[value] = operation_fields
+        if re.search('Start date', value):
+            collection = True
+
+    operations['PPK'] = operation_fields
+    return json.dumps(operations)
+
+
+def main():
+    parser = JobCardParser(VALUES_MAP)
+
+    print(f'{"rows":>6} {"legacy ms":>10} {"parser ms":>10} {"speedup":>8}')
+    for n_rows in ROW_SIZES:
+        rows = synthetic_rows(n_rows)
+        assert legacy_operations(rows) == json.dumps(parser.operations(rows))
+
+        number = max(1, 20000 // n_rows)
+        legacy = min(timeit.repeat(lambda: legacy_operations(rows), number=number, repeat=5)) / number
+        compiled = min(timeit.repeat(lambda: json.dumps(parser.operations(rows)), number=number, repeat=5)) / number
+
+        print(f'{n_rows:>6} {legacy * 1000:>10.3f} {compiled * 1000:>10.3f} {legacy / compiled:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
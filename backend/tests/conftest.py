@@ -52,3 +52,14 @@ def client(app):
 @pytest.fixture()
 def auth_header():
     return {"X-Api-Key": "test-key"}
+
+
+@pytest.fixture()
+def api_client(monkeypatch):
+    # /v1 routes without a database; tests stub the workshop calls they hit
+    from app import wsgi
+
+    monkeypatch.setattr(wsgi, "API_KEY_DEV", "test-key")
+    flask_app = create_app()
+    flask_app.config.update(TESTING=True)
+    return flask_app.test_client()
@@ -0,0 +1,118 @@
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+from app.services import background_jobs
+from app.services import workshop as ws
+from app.services.background_jobs import JobRunner
+
+AUTH = {"X-Api-Key": "test-key"}
+
+
+class FakeJobsTable:
+    '''background_jobs for JobRunner.submit, enforcing the pending (action, params) unique index.'''
+
+    def __init__(self):
+        self.jobs = []
+        self._result = None
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+    @contextmanager
+    def transaction(self):
+        yield
+
+    @contextmanager
+    def cursor(self, row_factory=None):
+        yield self
+
+    def fetchone(self):
+        return self._result
+
+    def execute(self, query, params=()):
+        query = ' '.join(query.split())
+        self._result = None
+
+        if query.startswith('INSERT INTO background_jobs'):
+            action, params_json = params[0], params[1]
+            if self._pending(action, params_json) is None:
+                job = {'id': len(self.jobs) + 1, 'action': action, 'params_json': params_json,
+                       'params': None, 'status': 'queued', 'requested': 1}
+                self.jobs.append(job)
+                self._result = job
+        elif query.startswith('UPDATE background_jobs SET requested'):
+            job = self._pending(params[0], params[1])
+            if job is not None:
+                job['requested'] += 1
+                self._result = job
+
+    def _pending(self, action, params_json):
+        for job in self.jobs:
+            if (job['action'], job['params_json']) == (action, params_json) and job['status'] == 'queued':
+                return job
+
+
+@pytest.fixture()
+def runner(monkeypatch):
+    table = FakeJobsTable()
+    monkeypatch.setattr(background_jobs, 'get_pool', lambda: table)
+    release = threading.Event()
+    runner = JobRunner({'db_upd': lambda **params: release.wait(5)}, max_workers=1)
+    yield runner
+    release.set()
+    runner.shutdown()
+
+
+def test_same_trigger_is_merged_different_params_are_not(runner):
+    first, created = runner.submit('db_upd', {})
+    again, merged_created = runner.submit('db_upd', {})
+    full, full_created = runner.submit('db_upd', {'full': True})
+
+    assert created and not merged_created and full_created
+    assert again['id'] == first['id'] and again['requested'] == 2
+    assert full['id'] != first['id']
+
+
+def test_trigger_returns_202_with_job_id(api_client, monkeypatch):
+    submitted = []
+
+    class Runner:
+        def submit(self, action, params):
+            submitted.append((action, params))
+            return {'id': 7, 'status': 'queued'}, len(submitted) == 1
+
+    monkeypatch.setattr(ws, 'get_job_runner', Runner)
+
+    first = api_client.post('/v1/wsop/go', json={'action': 'db_upd', 'data': {'full': True}}, headers=AUTH)
+    second = api_client.post('/v1/wsop/go', json={'action': 'db_upd', 'data': {'full': True}}, headers=AUTH)
+
+    assert first.status_code == 202
+    assert first.get_json() == {'status': 'accepted', 'action': 'db_upd', 'job_id': 7,
+                                'job_status': 'queued', 'merged': False}
+    assert second.get_json()['merged'] is True
+    assert submitted == [('db_upd', {'full': True})] * 2
+
+
+def test_wait_runs_the_action_inline(api_client, monkeypatch):
+    monkeypatch.setattr(ws, 'get_job_runner', lambda: pytest.fail('job runner used with "wait"'))
+    monkeypatch.setattr(ws, 'update_google_master_table', lambda **data: {'mode': 'diff', **data})
+
+    res = api_client.post('/v1/wsop/go', json={'action': 'mstr_upd', 'wait': True, 'data': {'full': True}},
+                          headers=AUTH)
+
+    assert res.status_code == 200
+    assert res.get_json() == {'status': 'success', 'action': 'mstr_upd', 'result': {'mode': 'diff', 'full': True}}
+
+
+def test_job_status_is_polled_by_id(api_client, monkeypatch):
+    class Runner:
+        def get(self, job_id):
+            return {'id': job_id, 'status': 'succeeded'} if job_id == 7 else None
+
+    monkeypatch.setattr(ws, 'get_job_runner', Runner)
+
+    assert api_client.get('/v1/wsop/jobs/7', headers=AUTH).get_json()['job'] == {'id': 7, 'status': 'succeeded'}
+    assert api_client.get('/v1/wsop/jobs/8', headers=AUTH).status_code == 404
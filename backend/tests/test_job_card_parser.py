@@ -0,0 +1,38 @@
+from app.services.job_card_parser import JobCardParser
+
+VALUES_MAP = {
+    'name' : '7_1',
+    'part_number' : '9_1',
+    'serial_number' : '9_7',
+    'project' : '5_7'
+}
+
+
+def make_rows():
+    rows = [[] for _ in range(14)]
+    rows[4] = ['', '', '', '', '', '', 'Project X']
+    rows[6] = ['JC-1']
+    rows[8] = ['PN-1', '', '', '', '', '', '']
+    rows[10] = ['Start date']
+    rows[11] = ['10_COAT\n']
+    rows[12] = ['20_NDT']
+    rows[13] = ['End date']
+    rows.append(['30_OUT'])
+    return rows
+
+
+def test_header_reads_values_map_cells():
+    header = JobCardParser(VALUES_MAP).header(make_rows())
+    assert header == {'name': 'JC-1', 'part_number': 'PN-1', 'serial_number': None, 'project': 'Project X'}
+
+
+def test_operations_between_markers_in_row_order():
+    operations = JobCardParser(VALUES_MAP).operations(make_rows())
+    assert list(operations) == ['10_COAT', '20_NDT', 'PPK']
+    assert operations['10_COAT'] == dict.fromkeys(JobCardParser.OPERATION_FIELDS)
+
+
+def test_operations_get_separate_field_dicts():
+    operations = JobCardParser(VALUES_MAP).operations(make_rows())
+    operations['10_COAT']['comment'] = 'x'
+    assert operations['20_NDT']['comment'] is None
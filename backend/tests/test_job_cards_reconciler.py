@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from app.services.workshop import JobCardsReconciler
+
+SYNCED = datetime(2026, 10, 1, 12, 0)
+CHANGED = datetime(2026, 10, 2, 8, 30)
+
+
+def test_stale_splits_ingest_and_touch():
+    files = [
+        {'id': 'new', 'modifiedTime': CHANGED},
+        {'id': 'same', 'modifiedTime': SYNCED, 'md5Checksum': 'a'},
+        {'id': 'edited', 'modifiedTime': CHANGED, 'md5Checksum': 'b'},
+        {'id': 'resaved', 'modifiedTime': CHANGED, 'md5Checksum': 'c'},
+        {'id': 'inactive', 'modifiedTime': SYNCED},
+    ]
+    db_rows = {
+        'same': (SYNCED, True, 'a'),
+        'edited': (SYNCED, True, 'x'),
+        'resaved': (SYNCED, True, 'c'),
+        'inactive': (SYNCED, False, None),
+    }
+
+    to_ingest, to_touch = JobCardsReconciler().stale(files, db_rows)
+
+    assert [file['id'] for file in to_ingest] == ['new', 'edited', 'inactive']
+    assert [file['id'] for file in to_touch] == ['resaved']
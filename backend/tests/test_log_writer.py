@@ -0,0 +1,49 @@
+import json
+
+from app.services.log_writer import LogWriter
+
+
+class FlakyWriter(LogWriter):
+    '''LogWriter whose COPY fails while ``down`` is set.'''
+
+    def __init__(self, *args, **kwargs):
+        self.down = True
+        self.copied = []
+        super().__init__(*args, **kwargs)
+
+    def _copy(self, rows):
+        rows = list(rows)
+        if self.down:
+            raise ConnectionError("database unavailable")
+        self.copied.extend(message for _, message in rows)
+
+
+def test_failed_batch_is_spilled_and_replayed(tmp_path):
+    spill = tmp_path / "spill.jsonl"
+    writer = FlakyWriter(str(spill), batch_size=10, interval=0.05)
+
+    writer.write({"operation": "10_COAT"})
+    writer.write({"operation": "20_MECH"})
+    writer.close()
+
+    lines = [json.loads(line) for line in spill.read_text().splitlines()]
+    assert [line["message"]["operation"] for line in lines] == ["10_COAT", "20_MECH"]
+
+    writer = FlakyWriter(str(spill), batch_size=10, interval=0.05)
+    writer.down = False
+    writer.write({"operation": "30_OTK"})
+    writer.close()
+
+    assert [m["operation"] for m in writer.copied] == ["30_OTK", "10_COAT", "20_MECH"]
+    assert not spill.exists()
+
+
+def test_full_queue_spills_instead_of_blocking(tmp_path):
+    spill = tmp_path / "spill.jsonl"
+    writer = FlakyWriter(str(spill), batch_size=1, interval=60, max_queue=1)
+    writer.close()  # stop the consumer so the queue stays full
+
+    writer.write({"n": 1})
+    writer.write({"n": 2})
+
+    assert [json.loads(line)["message"] for line in spill.read_text().splitlines()] == [{"n": 2}]
@@ -0,0 +1,29 @@
+import time
+
+from app.services.read_cache import TTLCache
+
+
+def test_lru_eviction_and_counters():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1          # "b" is now least recently used
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (2, 1, 1, 2)
+
+
+def test_expired_and_invalidated_entries_miss():
+    cache = TTLCache(max_size=10, ttl=0.01)
+    cache.put("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+    cache.ttl = 60
+    cache.put("b", 2)
+    cache.invalidate(["b", "missing"])
+    assert cache.get("b") is None
+    assert cache.stats()["invalidations"] == 1
@@ -0,0 +1,140 @@
+import gzip
+
+import pytest
+
+from app.api import routes
+from app.services import workshop as ws
+
+AUTH = {"X-Api-Key": "test-key"}
+
+
+def make_card(operations_version=0, **operations):
+    return {
+        "drive_id": "jc1",
+        "name": "JC-1",
+        "modified_dttm": "2026-10-01 12:00:00",
+        "operations_version": operations_version,
+        "is_active": True,
+        "operations": operations or {"10_COAT": {"comment": None}},
+    }
+
+
+@pytest.fixture()
+def card(monkeypatch):
+    current = {"card": make_card()}
+    monkeypatch.setattr(ws.OperationManager, "get_job_card_data", lambda self, drive_id: current["card"])
+    return current
+
+
+def test_job_card_read_has_weak_etag_and_304_when_unchanged(api_client, card):
+    first = api_client.get("/v1/wsop/jc1", headers=AUTH)
+    assert first.status_code == 200
+    assert first.headers["ETag"].startswith('W/"jc1-2026-10-01T12:00:00-0-1"')
+
+    again = api_client.get("/v1/wsop/jc1", headers={**AUTH, "If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.data == b""
+
+
+def test_etag_changes_after_operation_write(api_client, card):
+    etag = api_client.get("/v1/wsop/jc1/10_COAT", headers=AUTH).headers["ETag"]
+
+    card["card"] = make_card(operations_version=1, **{"10_COAT": {"comment": "done"}})
+    res = api_client.get("/v1/wsop/jc1/10_COAT", headers={**AUTH, "If-None-Match": etag})
+
+    assert res.status_code == 200
+    assert res.headers["ETag"] != etag
+    assert res.get_json()["data"] == {"comment": "done"}
+
+
+def test_gzip_only_above_threshold_and_when_accepted(api_client, card, monkeypatch):
+    monkeypatch.setattr(routes.settings, "GZIP_MIN_BYTES", 200)
+
+    small = api_client.get("/v1/wsop/jc1", headers={**AUTH, "Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+
+    card["card"] = make_card(**{f"{n}_OP": {"comment": "x" * 20} for n in range(20)})
+
+    plain = api_client.get("/v1/wsop/jc1", headers=AUTH)
+    assert "Content-Encoding" not in plain.headers
+
+    packed = api_client.get("/v1/wsop/jc1", headers={**AUTH, "Accept-Encoding": "gzip, deflate"})
+    assert packed.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in packed.headers["Vary"]
+    assert gzip.decompress(packed.data) == plain.data
+
+
+@pytest.fixture()
+def cards(monkeypatch):
+    stored = {
+        "jc1": make_card(**{"10_COAT": {"comment": "a"}, "20_NDT": {"comment": "b"}}),
+        "jc2": make_card(**{"10_COAT": {"comment": "c"}}),
+    }
+    stored["jc2"]["drive_id"] = "jc2"
+    queries = []
+
+    def query(drive_ids):
+        queries.append(drive_ids)
+        return [(drive_id, stored[drive_id]) for drive_id in drive_ids if drive_id in stored]
+
+    monkeypatch.setattr(ws, "DbManager", lambda: _FakeDb(query))
+    monkeypatch.setattr(ws.OperationManager, "_cached_job_cards", classmethod(lambda cls, drive_ids: {}))
+    return queries
+
+
+class _FakeDb:
+    def __init__(self, query):
+        self.query = query
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def execute_query(self, query, params, fetch_results=False):
+        rows = self.query(params[0])
+        columns = list(make_card())
+        return [tuple(card[column] for column in columns) for _, card in rows], [(column,) for column in columns]
+
+
+def test_bulk_reads_cards_in_one_query_with_not_found(api_client, cards):
+    res = api_client.post("/v1/wsop/bulk", json={"drive_ids": ["jc1", "nope", "jc2", "jc1"]}, headers=AUTH)
+
+    assert res.status_code == 200
+    body = res.get_json()
+    assert sorted(body["data"]) == ["jc1", "jc2"]
+    assert body["not_found"] == ["nope"]
+    assert cards == [["jc1", "nope", "jc2"]]
+
+
+def test_bulk_trims_cards_to_selected_operations(api_client, cards):
+    res = api_client.post("/v1/wsop/bulk", json={"drive_ids": ["jc1", "jc2"], "operations": ["20_NDT"]},
+                          headers=AUTH)
+
+    data = res.get_json()["data"]
+    assert data["jc1"]["operations"] == {"20_NDT": {"comment": "b"}}
+    assert data["jc2"]["operations"] == {}
+
+
+@pytest.mark.parametrize("body", [
+    {},
+    {"drive_ids": "jc1"},
+    {"drive_ids": ["jc1", 2]},
+    {"drive_ids": ["jc1"], "operations": "10_COAT"},
+    {"drive_ids": ["jc1"], "operations": [{"a": 1}]},
+])
+def test_bulk_rejects_malformed_input(api_client, cards, body):
+    res = api_client.post("/v1/wsop/bulk", json=body, headers=AUTH)
+
+    assert res.status_code == 400
+    assert cards == []
+
+
+def test_bulk_caps_number_of_ids(api_client, cards, monkeypatch):
+    monkeypatch.setattr(routes.settings, "BULK_MAX_IDS", 2)
+
+    res = api_client.post("/v1/wsop/bulk", json={"drive_ids": ["a", "b", "c"]}, headers=AUTH)
+
+    assert res.status_code == 400
+    assert cards == []
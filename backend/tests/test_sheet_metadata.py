@@ -0,0 +1,21 @@
+import json
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from app.services.sheet_metadata import is_invalid_sheet_id_error
+
+
+def http_error(status, message):
+    content = json.dumps({"error": {"code": status, "message": message}}).encode()
+    return HttpError(httplib2.Response({"status": status}), content)
+
+
+def test_only_stale_sheet_id_messages_count():
+    assert is_invalid_sheet_id_error(http_error(400, "Invalid requests[0].updateCells: No grid with id: 123"))
+    assert is_invalid_sheet_id_error(http_error(400, "Invalid sheet id: 123"))
+
+    assert not is_invalid_sheet_id_error(
+        http_error(400, "Invalid requests[0].repeatCell: GridRange.startRowIndex[5] > endRowIndex[4] on sheetId 9")
+    )
+    assert not is_invalid_sheet_id_error(http_error(500, "No grid with id: 123"))
@@ -0,0 +1,50 @@
+from app.services.sheet_render import (
+    cells_update_requests,
+    coalesce_ranges,
+    diff_cells,
+    full_render_requests,
+    master_cells,
+)
+
+GREEN = {"red": 0.7, "green": 0.9, "blue": 0.7}
+
+
+def make_cells(serial="SN-1", note=None):
+    comments = {(1, 5): note} if note else {}
+    return master_cells(
+        [["project", "name", "serial_number", "ts"], ["P", "", serial, "10_COAT"]],
+        {(1, 1): ("JC-1", "https://docs.google.com/spreadsheets/d/abc")},
+        {(1, 3): GREEN, (1, 4): GREEN},
+        comments,
+    )
+
+
+def test_unchanged_dataset_has_no_diff():
+    assert diff_cells(make_cells(), make_cells(), ignore={"0,3"}) == {}
+
+
+def test_diff_contains_changed_and_removed_cells():
+    previous = make_cells(note="old note")
+    current = make_cells(serial="SN-2")
+    assert diff_cells(previous, current) == {"1,2": {"value": "SN-2"}, "1,5": {}}
+
+
+def test_adjacent_cells_share_one_request():
+    requests = cells_update_requests(7, {"1,3": {"value": "a"}, "1,4": {"color": GREEN}, "1,6": {}})
+    ranges = [r["updateCells"]["range"] for r in requests]
+    assert [(r["startColumnIndex"], r["endColumnIndex"]) for r in ranges] == [(3, 5), (6, 7)]
+    assert requests[0]["updateCells"]["rows"][0]["values"][1] == {"userEnteredFormat": {"backgroundColor": GREEN}}
+
+
+def test_coalesce_ranges_merges_rows_and_columns():
+    keys = ["1,2", "2,2", "3,2", "5,2", "1,3", "2,3", "3,3", "0,0"]
+    assert coalesce_ranges(keys) == [(0, 1, 0, 1), (1, 4, 2, 4), (5, 6, 2, 3)]
+
+
+def test_full_render_is_clear_values_and_link_format():
+    requests = full_render_requests(7, make_cells(note="n"))
+    assert len(requests) == 3
+    values = requests[1]["updateCells"]["rows"][1]["values"]
+    assert values[1] == {"userEnteredValue": {"formulaValue": '=HYPERLINK("https://docs.google.com/spreadsheets/d/abc"; "JC-1")'}}
+    assert values[5] == {"note": "n"}
+    assert requests[2]["repeatCell"]["range"]["startRowIndex"] == 1
@@ -0,0 +1,81 @@
+import threading
+import time
+
+from app.services.sheet_writes import SheetWriteQueue, cell_write_requests
+
+GREEN = {"red": 0.7, "green": 0.9, "blue": 0.7}
+WHITE = {"red": 1.0, "green": 1.0, "blue": 1.0}
+
+
+def test_burst_is_coalesced_into_one_send_last_write_wins():
+    sent = []
+    queue = SheetWriteQueue(sent.append, window=60)
+
+    queue.put(4, 6, color=WHITE)
+    queue.put(4, 6, color=GREEN)
+    queue.put(4, 6, note="late")
+    queue.put(4, 7, color=WHITE)
+
+    assert sent == []
+    assert queue.flush() == 2
+    assert sent == [{"4,6": {"color": GREEN, "note": "late"}, "4,7": {"color": WHITE}}]
+    assert queue.flush() == 0
+
+
+def test_zero_window_sends_every_write():
+    sent = []
+    queue = SheetWriteQueue(sent.append, window=0)
+
+    queue.put(1, 1, note=None)
+
+    assert sent == [{"1,1": {"note": None}}]
+
+
+def test_bursts_are_sent_from_one_flusher_thread():
+    threads = []
+    queue = SheetWriteQueue(lambda cells: threads.append(threading.current_thread()), window=0.05)
+
+    for col in range(2):
+        queue.put(1, col, color=GREEN)
+        deadline = time.monotonic() + 2
+        while len(threads) <= col and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    assert len(threads) == 2
+    assert threads[0] is threads[1] is not threading.current_thread()
+
+
+def test_failed_send_is_requeued_under_newer_writes():
+    sent = []
+
+    def send(cells):
+        if not sent:
+            sent.append(None)
+            raise ConnectionError("sheets down")
+        sent.append(cells)
+
+    queue = SheetWriteQueue(send, window=60, retry_delay=60)
+    queue.put(2, 3, color=WHITE, note="old")
+    try:
+        queue.flush()
+    except ConnectionError:
+        pass
+
+    queue.put(2, 3, color=GREEN)
+
+    assert queue.flush() == 1
+    assert sent[1] == {"2,3": {"color": GREEN, "note": "old"}}
+
+
+def test_same_payload_cells_share_a_request():
+    cells = {f"3,{col}": {"color": GREEN} for col in range(5)}
+    cells["3,7"] = {"note": None}
+
+    requests = cell_write_requests(9, cells)
+
+    assert [r["repeatCell"]["range"] for r in requests] == [
+        {"sheetId": 9, "startRowIndex": 3, "endRowIndex": 4, "startColumnIndex": 0, "endColumnIndex": 5},
+        {"sheetId": 9, "startRowIndex": 3, "endRowIndex": 4, "startColumnIndex": 7, "endColumnIndex": 8},
+    ]
+    assert requests[0]["repeatCell"]["fields"] == "userEnteredFormat.backgroundColor"
+    assert requests[1]["repeatCell"]["cell"] == {"note": None}
@@ -13,10 +13,10 @@ function apiFetch_(path, opts) {
 
   const url = base + pth;
 
-  const headers = {
+  const headers = Object.assign({
     'X-Api-Key': KEY,
     'ngrok-skip-browser-warning': '1'
-  };
+  }, (opts && opts.headers) || {});
 
   const payload = opts && opts.body ? JSON.stringify(opts.body) : undefined;
   const method  = (opts && opts.method) || 'get';
@@ -36,10 +36,18 @@ function apiFetch_(path, opts) {
     const txt  = res.getContentText();
     console.log({ url, code, preview: txt.slice(0, 160) });
 
+    // Conditional GET: caller keeps the body it already has
+    if (code === 304) {
+      return { notModified: true, etag: etagOf_(res) };
+    }
+
     if (code >= 200 && code < 300) {
       try {
         const json = JSON.parse(txt);
-        if (json && typeof json === 'object') return json;
+        if (json && typeof json === 'object') {
+          if (opts && opts.withEtag) return { json, etag: etagOf_(res) };
+          return json;
+        }
         throw new Error('Non-JSON success payload');
       } catch (e) {
         throw new Error('Expected JSON but got: ' + txt.slice(0, 500));
@@ -57,3 +65,30 @@ function apiFetch_(path, opts) {
 
   throw new Error(lastErr || 'Unknown API error');
 }
+
+function etagOf_(res) {
+  const headers = res.getAllHeaders();
+  return headers['ETag'] || headers['Etag'] || headers['etag'] || null;
+}
+
+/**
+ * GET with If-None-Match: the last body and its ETag are kept in the user
+ * cache, and a 304 from the API returns that body without a download.
+ */
+function apiFetchCached_(path, ttlSeconds = 21600) {
+  const cache = CacheService.getUserCache();
+  const key = 'etag:' + path;
+
+  let cached = null;
+  try { cached = JSON.parse(cache.get(key) || 'null'); } catch (e) { /* pass */ }
+
+  const headers = cached && cached.etag ? { 'If-None-Match': cached.etag } : {};
+  const res = apiFetch_(path, { method: 'get', headers, withEtag: true });
+
+  if (res.notModified && cached) return cached.json;
+
+  if (res.etag) {
+    try { cache.put(key, JSON.stringify({ etag: res.etag, json: res.json }), ttlSeconds); } catch (e) { /* too large */ }
+  }
+  return res.json;
+}
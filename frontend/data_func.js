@@ -1,8 +1,7 @@
 function call_dataflow_update() {
 
-  update_db_from_drive();
-  update_master_from_db();
-  update_projects_sheet();
+  // db_upd + mstr_upd + prj_upd in one server-side job
+  refresh_all();
 
 }
 
@@ -17,6 +17,34 @@ function wsopGo_(action, data = {}) {
   });
 }
 
+/**
+ * Start a background /wsop/go action and poll /wsop/jobs/<id> until it ends.
+ * A trigger that is merged into an already running job waits for that job.
+ * @param {string} action
+ * @param {object} data
+ * @param {number} timeoutMs - give up polling after this long
+ * @returns {object} finished job (status, result, error, ...)
+ */
+function wsopRunJob_(action, data = {}, timeoutMs = 300000) {
+  const accepted = wsopGo_(action, data);
+  if (!accepted.job_id) return accepted;   // ran inline
+
+  const deadline = Date.now() + timeoutMs;
+  let delay = 1000;
+
+  while (Date.now() < deadline) {
+    Utilities.sleep(delay);
+    const job = wsopGet_('jobs', accepted.job_id).job;
+
+    if (job.status === 'succeeded') return job;
+    if (job.status === 'failed') throw new Error(`${action} failed: ${job.error}`);
+
+    delay = Math.min(delay * 2, 5000);
+  }
+
+  throw new Error(`${action} is still running (job ${accepted.job_id})`);
+}
+
 /**
  * Generic GET under /wsop
  * @param {string[]} parts - path parts after /wsop
@@ -28,6 +56,14 @@ function wsopGet_(...parts) {
   return apiFetch_(path, { method: 'get' });
 }
 
+/**
+ * Like wsopGet_, but revalidates a cached copy with the API's ETag
+ */
+function wsopGetCached_(...parts) {
+  const path = [WSOP_BASE, ...parts.map(String)].join('/').replace(/\/{2,}/g, '/');
+  return apiFetchCached_(path);
+}
+
 /* === Public convenience wrappers (stable names kept) === */
 
 function color_current_cell(row_number, col_number, status) {
@@ -35,15 +71,19 @@ function color_current_cell(row_number, col_number, status) {
 }
 
 function update_db_from_drive() {
-  return wsopGo_('db_upd');
+  return wsopRunJob_('db_upd');
 }
 
 function update_projects_sheet() {
-  return wsopGo_('prj_upd');
+  return wsopRunJob_('prj_upd');
 }
 
 function update_master_from_db() {
-  return wsopGo_('mstr_upd');
+  return wsopRunJob_('mstr_upd');
+}
+
+function refresh_all() {
+  return wsopRunJob_('refresh');
 }
 
 function close_jc_color(row_number) {
@@ -61,9 +101,21 @@ function send_to_db(data) {
 }
 
 function get_single_operation_data(drive_id, operation) {
-  return wsopGet_(drive_id, operation);
+  return wsopGetCached_(drive_id, operation);
 }
 
 function get_job_card_database_data(drive_id) {
-  return wsopGet_(drive_id);
+  return wsopGetCached_(drive_id);
+}
+
+/**
+ * Several job cards in one request
+ * @param {string[]} drive_ids
+ * @param {string[]} [operations] - only these operations per card
+ * @returns {object} { data: { drive_id: card }, not_found: [drive_id] }
+ */
+function get_job_cards_database_data(drive_ids, operations = null) {
+  const body = { drive_ids };
+  if (operations) body.operations = operations;
+  return apiFetch_(`${WSOP_BASE}/bulk`, { method: 'post', body });
 }